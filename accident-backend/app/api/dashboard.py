@@ -5,7 +5,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import desc, and_, func, case, or_
 from typing import List, Optional, Dict, Any
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import json
 import asyncio
 
@@ -14,11 +14,14 @@ router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 
 # Import your models and dependencies
 try:
-    from models.database import get_db, User, AccidentLog
+    from models.database import get_db, User, AccidentLog, utcnow
     from auth.dependencies import get_current_active_user
 except ImportError as e:
     logging.warning(f"Import error: {e}. Using fallback methods.")
     
+    def utcnow():
+        return datetime.now(timezone.utc)
+    
     # Fallback database session
     def get_db():
         yield None
@@ -134,7 +137,7 @@ async def get_user_alerts(
                     and_(
                         AccidentLog.accident_detected == True,
                         AccidentLog.confidence >= 0.7,
-                        AccidentLog.created_at >= datetime.now() - timedelta(days=7)
+                        AccidentLog.created_at >= utcnow() - timedelta(days=7)
                     )
                 ).order_by(desc(AccidentLog.created_at))
                 
@@ -266,7 +269,8 @@ async def get_user_dashboard_stats(
         # Try to get real stats from database
         if db is not None:
             try:
-                now = datetime.now()
+                # created_at is stored in UTC (utcnow), so the cutoffs must be too
+                now = utcnow()
                 last_24h = now - timedelta(hours=24)
                 last_7d = now - timedelta(days=7)
                 
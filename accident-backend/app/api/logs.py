@@ -4,10 +4,10 @@ from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_, or_
+from sqlalchemy import desc, and_
 from pydantic import BaseModel
 
-from models.database import get_db, User, AccidentLog
+from models.database import get_db, User, AccidentLog, owned_by
 from auth.dependencies import get_current_active_user, get_optional_user
 
 logger = logging.getLogger(__name__)
@@ -161,10 +161,7 @@ async def get_logs(
             try:
                 # Filter by user
                 user_logs_query = db.query(AccidentLog).filter(
-                    or_(
-                        AccidentLog.user_id == current_user.id,
-                        AccidentLog.created_by == current_user.username
-                    )
+                    owned_by(current_user.id)
                 ).order_by(desc(AccidentLog.created_at))
                 
                 total_count = user_logs_query.count()
@@ -398,18 +395,12 @@ async def get_logs_stats(
             elif current_user:
                 # User gets only their stats
                 total_logs = db.query(AccidentLog).filter(
-                    or_(
-                        AccidentLog.user_id == current_user.id,
-                        AccidentLog.created_by == current_user.username
-                    )
+                    owned_by(current_user.id)
                 ).count()
                 accidents_count = db.query(AccidentLog).filter(
                     and_(
                         AccidentLog.accident_detected == True,
-                        or_(
-                            AccidentLog.user_id == current_user.id,
-                            AccidentLog.created_by == current_user.username
-                        )
+                        owned_by(current_user.id)
                     )
                 ).count()
                 
@@ -16,7 +16,8 @@ MODEL_CONFIG = {
         "transfer_mobilenetv2_20250830_120140_best.keras",
         "transfer_mobilenetv2_20250830_120140_final.keras"
     ],
-    "active_model": "transfer_mobilenetv2_20250830_120140_best.keras"  # Use the best model
+    "active_model": "transfer_mobilenetv2_20250830_120140_best.keras",  # Use the best model
+    "active_model_tflite": "transfer_mobilenetv2_20250830_120140_best_int8.tflite"  # Served instead when present
 }
 
 def get_model_path():
@@ -12,6 +12,8 @@ from models.database import get_db, User, Admin
 from auth.dependencies import get_current_user_or_admin, get_current_user_info
 from services.analysis import analyze_frame_with_logging, get_model_info
 from services.database import log_accident_detection
+from services import cache
+from utils.uploads import read_upload, read_video_frame, UploadTooLargeError
 
 router = APIRouter()
 logger = logging.getLogger('api')
@@ -127,18 +129,42 @@ async def upload_file(
                 status_code=413
             )
         
-        # Read file content
+        # Read file content in chunks; videos are decoded from disk instead of held in memory
+        frame = None
+        file_content = None
         try:
-            file_content = await file.read()
-            if len(file_content) == 0:
-                return create_cors_response(
-                    {
-                        "detail": "File content is empty",
-                        "error": "Empty file content",
-                        "success": False
-                    },
-                    status_code=400
-                )
+            if file.content_type.startswith('video/'):
+                frame = await read_video_frame(file)
+                if frame is None:
+                    return create_cors_response(
+                        {
+                            "detail": "Could not decode a frame from the uploaded video",
+                            "error": "Invalid video content",
+                            "success": False
+                        },
+                        status_code=400
+                    )
+            else:
+                file_content = await read_upload(file, max_size=max_size)
+                if len(file_content) == 0:
+                    return create_cors_response(
+                        {
+                            "detail": "File content is empty",
+                            "error": "Empty file content",
+                            "success": False
+                        },
+                        status_code=400
+                    )
+        except UploadTooLargeError:
+            return create_cors_response(
+                {
+                    "detail": f"File too large for {user_info['user_type']}. Maximum size is {max_size // (1024*1024)}MB.",
+                    "error": "File too large",
+                    "max_size_mb": max_size // (1024*1024),
+                    "success": False
+                },
+                status_code=413
+            )
         except Exception as e:
             logger.error(f"Failed to read file content: {str(e)}")
             return create_cors_response(
@@ -153,6 +179,7 @@ async def upload_file(
         # Analyze the file using the correct service
         try:
             result = await analyze_frame_with_logging(
+                frame=frame,
                 frame_bytes=file_content,
                 source=f"{user_info['user_type']}_upload_{user_info['username']}",
                 frame_id=f"upload_{int(time.time() * 1000)}"
@@ -189,6 +216,7 @@ async def upload_file(
                         log_entry.user_id = user_info['id']
                         log_entry.created_by = user_info['username']
                         db.commit()
+                        cache.invalidate_user(user_info)
                         log_id = log_entry.id
                         snapshot_url = log_entry.snapshot_url
                         logger.info(f"Added user tracking to log entry {log_entry.id}")
@@ -408,6 +436,7 @@ async def analyze_url(
                         log_entry.user_id = user_info['id']
                         log_entry.created_by = user_info['username']
                         db.commit()
+                        cache.invalidate_user(user_info)
                         log_id = log_entry.id
                         snapshot_url = log_entry.snapshot_url
                     except Exception as e:
@@ -236,3 +236,7 @@ def get_current_user_info(current_user: Union[User, Admin]) -> dict:
             'user_type': 'user',
             'is_active': getattr(current_user, 'is_active', True)
         }
+
+def current_user_info(current_user: Union[User, Admin] = Depends(get_current_user_or_admin)) -> dict:
+    """Dependency form of get_current_user_info; FastAPI resolves it once per request"""
+    return get_current_user_info(current_user)
@@ -31,6 +31,48 @@ THREAD_POOL_SIZE = 2
 WEBSOCKET_TIMEOUT = 60
 FRAME_PROCESSING_INTERVAL = 2.0
 
+# Live inference batching
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", 8))
+MAX_BATCH_WAIT_MS = float(os.getenv("MAX_BATCH_WAIT_MS", 10))
+FRAME_QUEUE_SIZE = int(os.getenv("FRAME_QUEUE_SIZE", 2))  # Per-connection backlog, oldest frames dropped
+MAX_QUEUED_PREDICTIONS = int(os.getenv("MAX_QUEUED_PREDICTIONS", 32))  # Frames waiting for a batch, oldest dropped
+# Batched predictions run in this many worker processes (one model copy each) instead of threads; 0 disables
+ML_PROCESS_WORKERS = int(os.getenv("ML_PROCESS_WORKERS", 0))
+# Frames with at least this many pixels are resized on the GPU when OpenCV has CUDA; 0 disables
+CUDA_RESIZE_MIN_PIXELS = int(os.getenv("CUDA_RESIZE_MIN_PIXELS", 1280 * 720))
+
+# Routine (no-accident) analysis rows are inserted in batches by a background writer
+LOG_WRITE_BATCH_SIZE = int(os.getenv("LOG_WRITE_BATCH_SIZE", 100))
+LOG_WRITE_INTERVAL_MS = float(os.getenv("LOG_WRITE_INTERVAL_MS", 200))
+
+# Live frame result cache (keyed by perceptual hash)
+FRAME_CACHE_SIZE = int(os.getenv("FRAME_CACHE_SIZE", 1024))
+FRAME_CACHE_TTL = float(os.getenv("FRAME_CACHE_TTL", 1.0))
+
+# Shared model server: when set, workers send predictions to one model process
+# listening on this address instead of each loading their own copy of the model
+MODEL_SERVER_ADDRESS = os.getenv("MODEL_SERVER_ADDRESS", "")
+MODEL_SERVER_AUTHKEY = os.getenv("MODEL_SERVER_AUTHKEY", SECRET_KEY).encode()
+
+# The INT8 TFLite variant of the Keras model is preferred when present (see quantize_tflite.py)
+TFLITE_NUM_THREADS = int(os.getenv("TFLITE_NUM_THREADS", os.cpu_count() or 1))
+
+# Optional INT8 ONNX model for live batches (see quantize_onnx.py)
+ONNX_MODEL_PATH = os.getenv("ONNX_MODEL_PATH", "")
+# Serve /api/live/* from the batched ONNX router (routers/live.py) instead of api/websocket.py;
+# needs ONNX_MODEL_PATH, without it that router only returns mock results
+LIVE_BATCH_ROUTER = os.getenv("LIVE_BATCH_ROUTER", "0") == "1"
+DETECTION_THRESHOLD = float(os.getenv("DETECTION_THRESHOLD", 0.5))
+
+# Dashboard response cache (Redis if REDIS_URL is set; per-process only when opted in)
+REDIS_URL = os.getenv("REDIS_URL", "")
+# Per-process invalidation only reaches one worker: enable only for single-worker deployments
+LOCAL_RESPONSE_CACHE = os.getenv("LOCAL_RESPONSE_CACHE", "0") == "1"
+DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", 45))
+ALERT_QUEUE_SIZE = int(os.getenv("ALERT_QUEUE_SIZE", 100))  # Per-WebSocket outbox; slower clients are dropped
+ALERT_COOLDOWN_SECONDS = float(os.getenv("ALERT_COOLDOWN_SECONDS", 3.0))  # One realtime alert per source/session in this window
+ALERT_BROADCAST_CONCURRENCY = int(os.getenv("ALERT_BROADCAST_CONCURRENCY", 8))  # Alert broadcasts running at once
+
 # File paths
 SNAPSHOTS_DIR = BASE_DIR / "snapshots"
 
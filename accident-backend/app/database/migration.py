@@ -6,6 +6,83 @@ from sqlalchemy.exc import OperationalError
 
 logger = logging.getLogger(__name__)
 
+# Must match AccidentLog.__table_args__ in models/database.py
+ACCIDENT_LOG_INDEXES = {
+    "ix_accident_logs_user_detected_created": "user_id, accident_detected, created_at DESC",
+    "ix_accident_logs_created_stats": "created_at, accident_detected, confidence, processing_time",
+}
+# Superseded once user_id became the only ownership column
+DROPPED_ACCIDENT_LOG_INDEXES = ("ix_accident_logs_creator_detected_created",)
+
+def create_accident_log_indexes(engine, database_url: str):
+    """Create the dashboard indexes if missing; CONCURRENTLY on PostgreSQL so writes aren't blocked"""
+    concurrently = "" if "sqlite" in database_url.lower() else " CONCURRENTLY"
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for name, columns in ACCIDENT_LOG_INDEXES.items():
+            connection.execute(text(f"CREATE INDEX{concurrently} IF NOT EXISTS {name} ON accident_logs ({columns})"))
+            logger.info(f"Index {name} ensured on accident_logs")
+        for name in DROPPED_ACCIDENT_LOG_INDEXES:
+            connection.execute(text(f"DROP INDEX{concurrently} IF EXISTS {name}"))
+
+def backfill_accident_log_owners(connection):
+    """Resolve user_id for logs that only recorded the creator's username"""
+    result = connection.execute(text("""
+        UPDATE accident_logs SET user_id = COALESCE(
+            (SELECT users.id FROM users WHERE users.username = accident_logs.created_by),
+            (SELECT admins.id FROM admins WHERE admins.username = accident_logs.created_by)
+        )
+        WHERE user_id IS NULL AND created_by IS NOT NULL
+    """))
+    connection.commit()
+    if result.rowcount:
+        logger.info(f"Backfilled user_id on {result.rowcount} accident_logs rows")
+
+# Channel the accident_logs trigger notifies when an accident gets an owner
+ALERT_NOTIFY_CHANNEL = "accident_alerts"
+# The dashboard alert list only shows accidents this confident; nothing below it is pushed either
+ALERT_MIN_CONFIDENCE = 0.6
+
+# Rows that can be alerts at all, checked in the trigger's WHEN clause before the function runs
+ALERT_NOTIFY_CONDITION = (
+    f"NEW.accident_detected AND NEW.created_by IS NOT NULL AND NEW.confidence >= {ALERT_MIN_CONFIDENCE}"
+)
+
+# OLD can't appear in the WHEN clause of a trigger that also fires on INSERT
+ALERT_NOTIFY_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION notify_accident_alert() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' OR OLD.created_by IS DISTINCT FROM NEW.created_by THEN
+        PERFORM pg_notify('{ALERT_NOTIFY_CHANNEL}', json_build_object(
+            'id', NEW.id,
+            'confidence', NEW.confidence,
+            'created_at', NEW.created_at,
+            'status', NEW.status,
+            'location', NEW.location,
+            'snapshot_url', NEW.snapshot_url,
+            'user_id', NEW.user_id,
+            'created_by', NEW.created_by
+        )::text);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+def create_alert_notify_trigger(engine, database_url: str):
+    """PostgreSQL only: NOTIFY dashboards when an accident log is attached to a user"""
+    if "sqlite" in database_url.lower():
+        return
+    # Uploads set created_by in a follow-up UPDATE, so fire on that as well as INSERT
+    with engine.begin() as connection:
+        connection.execute(text(ALERT_NOTIFY_FUNCTION))
+        connection.execute(text("DROP TRIGGER IF EXISTS accident_alert_notify ON accident_logs"))
+        connection.execute(text(
+            "CREATE TRIGGER accident_alert_notify AFTER INSERT OR UPDATE OF created_by ON accident_logs "
+            f"FOR EACH ROW WHEN ({ALERT_NOTIFY_CONDITION}) EXECUTE FUNCTION notify_accident_alert()"
+        ))
+    logger.info("Alert notify trigger ensured on accident_logs")
+
 def run_migration():
     """Add department and user_id columns to users/accident_logs tables if they don't exist"""
     try:
@@ -56,6 +133,11 @@ def run_migration():
                 
                 connection.commit()
                 logger.info("user_id and created_by columns added successfully to accident_logs table")
+            
+            backfill_accident_log_owners(connection)
+        
+        create_accident_log_indexes(engine, database_url)
+        create_alert_notify_trigger(engine, database_url)
                 
     except Exception as e:
         logger.error(f"Migration failed: {str(e)}")
@@ -1,15 +1,17 @@
 # handlers/lifecycle.py - Application Lifecycle Management
 import os
 import sys
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
 from models.database import create_tables, SessionLocal
 from auth.handlers import create_default_super_admin
-from services.analysis import warmup_model, cleanup_thread_pool
+from services.analysis import warmup_model, cleanup_thread_pool, cleanup_thread_pool_async
 from config.settings import SNAPSHOTS_DIR
 from database.migration import run_migration
+from routes.dashboard import run_alert_subscriber, run_alert_listener
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +22,8 @@ async def lifespan(app: FastAPI):
     logger.info("=" * 80)
     logger.info("STARTING ACCIDENT DETECTION API v2.5.1 - FIXED AUTHENTICATION")
     logger.info("=" * 80)
+    # uvicorn picks uvloop when it is installed ("auto"); make a silent fallback to asyncio visible
+    logger.info(f"Event loop: {type(asyncio.get_running_loop()).__module__}")
     
     try:
         create_tables()
@@ -42,6 +46,11 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"Model warmup failed: {e}")
         
+        # Relay alert updates published by other workers to this worker's dashboards
+        alert_subscriber = asyncio.create_task(run_alert_subscriber())
+        # Push new alerts to their owners as PostgreSQL reports them
+        alert_listener = asyncio.create_task(run_alert_listener())
+        
         SNAPSHOTS_DIR.mkdir(exist_ok=True)
         logger.info(f"Snapshots directory ready: {SNAPSHOTS_DIR}")
         
@@ -56,8 +65,10 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down API...")
+    alert_subscriber.cancel()
+    alert_listener.cancel()
     try:
-        cleanup_thread_pool()
+        await cleanup_thread_pool_async()
     except Exception as e:
         logger.error(f"Cleanup error: {e}")
     logger.info("Shutdown complete")
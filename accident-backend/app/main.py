@@ -11,7 +11,13 @@ from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
 
 # Import configuration
-from config.settings import SNAPSHOTS_DIR, PORT, HOST, get_cors_origins
+from config.settings import SNAPSHOTS_DIR, PORT, HOST, get_cors_origins, LIVE_BATCH_ROUTER, ONNX_MODEL_PATH
+
+# Shared model server (opt-in via MODEL_SERVER_ADDRESS), started before the services below
+# import the model: in client mode they connect to it
+if __name__ == "__main__":
+    from services.model_server import start_model_server
+    start_model_server()
 
 # Import database setup
 from models.database import create_tables, SessionLocal
@@ -22,6 +28,7 @@ from services.analysis import warmup_model, cleanup_thread_pool
 
 # Import middleware
 from middleware.cors import CustomCORSMiddleware
+from middleware.health_interceptor import HealthCheckInterceptor
 
 # Import routers
 from routes.health import router as health_router
@@ -77,6 +84,9 @@ if os.getenv("ENVIRONMENT") == "production":
         ]
     )
 
+# Added last so it is the outermost user middleware: probes skip CORS/trusted-host handling
+app.add_middleware(HealthCheckInterceptor)
+
 # Mount static files for snapshots
 try:
     app.mount("/snapshots", StaticFiles(directory="snapshots"), name="snapshots")
@@ -93,8 +103,15 @@ app.include_router(core_router, prefix="/api", tags=["core"])
 app.include_router(upload_router, prefix="/api", tags=["upload"])
 app.include_router(logs_router, prefix="/api", tags=["logs"])
 
-# WebSocket endpoints
-app.websocket("/api/live/ws")(websocket_endpoint)
+# WebSocket endpoints: the batched ONNX live router when opted in, otherwise the analysis-service handler
+if LIVE_BATCH_ROUTER:
+    from routers.live import router as live_router
+    app.include_router(live_router, tags=["live"])
+    if not ONNX_MODEL_PATH:
+        logger.warning("LIVE_BATCH_ROUTER is set without ONNX_MODEL_PATH: /api/live/* returns mock results")
+    logger.info("Serving /api/live/* from the batched live router")
+else:
+    app.websocket("/api/live/ws")(websocket_endpoint)
 
 # Setup error handlers
 setup_exception_handlers(app)
@@ -173,6 +190,9 @@ async def force_reload_model(model_path: str = None):
     try:
         from services.detection import force_model_reload
         result = force_model_reload(model_path)
+        if result.get("success"):
+            from services.analysis import refresh_model_capabilities
+            refresh_model_capabilities()
         
         status_code = 200 if result.get("success") else 400
         return JSONResponse(status_code=status_code, content=result)
@@ -467,10 +487,24 @@ if __name__ == "__main__":
     
     print("=" * 80)
     
+    # Prefer the libuv event loop and C HTTP parser (both pinned in requirements.txt)
+    try:
+        import uvloop  # noqa: F401
+        loop_impl = "uvloop"
+    except ImportError:
+        loop_impl = "auto"
+    try:
+        import httptools  # noqa: F401
+        http_impl = "httptools"
+    except ImportError:
+        http_impl = "auto"
+    
     uvicorn.run(
         app, 
         host=HOST, 
         port=PORT,
+        loop=loop_impl,
+        http=http_impl,
         log_level="info",
         access_log=True
     )
@@ -1,6 +1,7 @@
 # models/database.py - UPDATED for psycopg3 compatibility
 import os
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, create_engine
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, Index, create_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 from sqlalchemy.sql import func
 from config.settings import SQLALCHEMY_DATABASE_URL
@@ -21,6 +22,7 @@ if "postgresql" in SQLALCHEMY_DATABASE_URL or "postgres" in SQLALCHEMY_DATABASE_
         pool_recycle=300,
         pool_size=5,
         max_overflow=10,
+        query_cache_size=1200,
         connect_args={
             "sslmode": "require" if os.getenv("DATABASE_URL") else "prefer"
         }
@@ -33,12 +35,17 @@ else:
         pool_pre_ping=True,
         pool_recycle=300,
         pool_size=5,
-        max_overflow=10
+        max_overflow=10,
+        query_cache_size=1200
     )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+def utcnow() -> datetime:
+    """Timezone-aware insert timestamp computed client-side"""
+    return datetime.now(timezone.utc)
+
 def get_db():
     """Dependency to get database session"""
     db = SessionLocal()
@@ -80,7 +87,7 @@ class AccidentLog(Base):
     __tablename__ = "accident_logs"
     
     id = Column(Integer, primary_key=True, index=True)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    timestamp = Column(DateTime(timezone=True), default=utcnow)
     video_source = Column(String(255), default="unknown")
     confidence = Column(Float)
     accident_detected = Column(Boolean)
@@ -96,11 +103,24 @@ class AccidentLog(Base):
     weather_conditions = Column(String(100), nullable=True)
     severity_estimate = Column(String(50), nullable=True)
     user_feedback = Column(String(100), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Python-side default so INSERTs don't need RETURNING to learn the value
+    created_at = Column(DateTime(timezone=True), default=utcnow)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     # User tracking columns - ADDED for user-specific functionality
     user_id = Column(Integer, nullable=True)
     created_by = Column(String(255), nullable=True)
+    
+    # Per-user dashboard queries filter on owner + accident_detected and sort newest first;
+    # the analysis stats aggregate a created_at range, covered by the second index.
+    # Existing databases get these from database/migration.py.
+    __table_args__ = (
+        Index("ix_accident_logs_user_detected_created", user_id, accident_detected, created_at.desc()),
+        Index("ix_accident_logs_created_stats", created_at, accident_detected, confidence, processing_time),
+    )
+
+def owned_by(user_id: int):
+    """Ownership filter for AccidentLog; the migration backfills user_id from created_by"""
+    return AccidentLog.user_id == user_id
 
 def create_tables():
     """Create all database tables"""
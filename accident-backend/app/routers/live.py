@@ -1,93 +1,381 @@
 # app/routers/live.py - Fixed WebSocket handler
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.responses import StreamingResponse
-import json
+import os
+import orjson
+import msgspec
 import asyncio
 import logging
 import base64
-import uuid
+import itertools
+import re
 import time
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from typing import List, Optional, Union
+from weakref import WeakValueDictionary
+import numpy as np
+
+from config.settings import (
+    MAX_BATCH_SIZE, MAX_BATCH_WAIT_MS, FRAME_CACHE_SIZE, FRAME_CACHE_TTL, FRAME_QUEUE_SIZE, DETECTION_THRESHOLD
+)
+from services.analysis_kernels import preprocess_batch, ahash, gpu_decode_batch, decode_frame, GPU_DECODE_AVAILABLE
+from services.onnx_model import get_onnx_session, run_onnx_batch
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Store active connections
-active_connections = {}
+# Store active connections, keyed by a process-local integer id.
+# Weak values so a socket whose handler has exited never lingers here.
+active_connections: "WeakValueDictionary[int, WebSocket]" = WeakValueDictionary()
+_next_client_id = itertools.count(1)
+
+# Worker threads for CPU-bound frame decoding, keeping it off the event loop
+DECODE_POOL = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="Frame_Decode")
+
+# Binary frame layout: little-endian uint64 frame_id, uint64 timestamp, then raw JPEG bytes
+FRAME_HEADER = struct.Struct('<QQ')
+
+class FrameResponse(msgspec.Struct):
+    """Fixed per-frame response schema, encoded without building a dict"""
+    timestamp: Union[int, float, None]
+    accident_detected: bool
+    confidence: float
+    details: str
+    frame_id: Union[int, str, None]
+    processing_time: float
+    dropped_frames: int
+
+# Replies use the client's framing: msgpack for binary clients, JSON text otherwise
+msgpack_encoder = msgspec.msgpack.Encoder()
+json_encoder = msgspec.json.Encoder()
+
+# Locates the base64 "frame" value in a JSON text message (base64 never contains quotes or escapes)
+FRAME_FIELD = re.compile(r'"frame"\s*:\s*"([^"\\]*)"')
+
+# Shared inference queue drained by a single batching consumer.
+# Created lazily so it binds to the running event loop.
+frame_queue: Optional[asyncio.Queue] = None
+_server_task: Optional[asyncio.Task] = None
+
+# Model input resolution (MobileNetV2)
+INPUT_SIZE = (224, 224)
+
+# Recent results keyed by (stream, frame aHash) -> (stored_at, result), oldest first.
+# The stream is the WebSocket connection: different cameras' low-texture frames hash alike,
+# so results are never shared across connections, and stream-less HTTP frames aren't cached.
+_result_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+UNDECODABLE_RESULT = {
+    "accident_detected": False,
+    "confidence": 0.0,
+    "details": "Could not decode frame",
+    "processing_time": 0.0
+}
+
+def decode_batch(batch: List[bytes]):
+    """Decode JPEG frames on the CPU and hash each one (None for undecodable frames)"""
+    images = [decode_frame(frame, INPUT_SIZE) for frame in batch]
+    hashes = [ahash(image) if image is not None else None for image in images]
+    return images, hashes
+
+# Model input staging buffer, allocated once. Reuse is safe because server_loop
+# runs one batch at a time and the model consumes it before the next batch.
+_input_buffer = np.empty((MAX_BATCH_SIZE, INPUT_SIZE[1], INPUT_SIZE[0], 3), dtype=np.float32)
+
+def build_tensor(images: List[np.ndarray]) -> np.ndarray:
+    """Build the normalized float32 NHWC model input from decoded frames"""
+    return preprocess_batch(images, _input_buffer)
 
-async def analyze_frame(frame_bytes):
+def get_cached_result(key: tuple, now: float) -> Optional[dict]:
+    """Return a fresh cached result for this (stream, frame hash), if any"""
+    entry = _result_cache.get(key)
+    if entry is None or now - entry[0] > FRAME_CACHE_TTL:
+        return None
+    _result_cache.move_to_end(key)
+    return dict(entry[1])
+
+def cache_result(key: tuple, result: dict, now: float):
+    """Store a result, evicting the least recently used entry past FRAME_CACHE_SIZE"""
+    _result_cache[key] = (now, result)
+    _result_cache.move_to_end(key)
+    if len(_result_cache) > FRAME_CACHE_SIZE:
+        _result_cache.popitem(last=False)
+
+async def analyze_frames_batch(batch: List[bytes], streams: Optional[list] = None) -> List[dict]:
     """
-    Mock analyze_frame function - replace with your actual AI model
+    Batched analysis: runs the INT8 ONNX model when ONNX_MODEL_PATH is set,
+    otherwise a mock. One call covers the whole batch, so the fixed model
+    cost is paid once.
+    Frames matching a recently analyzed frame of the same stream are served from the cache.
     """
     import random
-    import asyncio
     
-    # Simulate processing time
+    loop = asyncio.get_running_loop()
+    results = [dict(UNDECODABLE_RESULT) for _ in batch]
+    if streams is None:
+        streams = [None] * len(batch)
+    tensor = None
+    hashes = [None] * len(batch)
+    misses = list(range(len(batch)))
+    
+    if GPU_DECODE_AVAILABLE:
+        tensor = await loop.run_in_executor(DECODE_POOL, gpu_decode_batch, batch, INPUT_SIZE)
+    
+    if tensor is None:
+        images, hashes = await loop.run_in_executor(DECODE_POOL, decode_batch, batch)
+        now = time.monotonic()
+        misses = []
+        for i, frame_hash in enumerate(hashes):
+            if frame_hash is None:
+                continue
+            if streams[i] is None:
+                # Decodable but not cacheable
+                hashes[i] = None
+                misses.append(i)
+                continue
+            hashes[i] = (streams[i], frame_hash)
+            cached = get_cached_result(hashes[i], now)
+            if cached is not None:
+                results[i] = cached
+            else:
+                misses.append(i)
+        if not misses:
+            return results
+        tensor = await loop.run_in_executor(DECODE_POOL, build_tensor, [images[i] for i in misses])
+    
+    now = time.monotonic()
+    session = get_onnx_session()
+    if session is not None:
+        # Quantized ONNX model: one session.run for the whole batch
+        start_time = time.perf_counter()
+        confidences = await loop.run_in_executor(DECODE_POOL, run_onnx_batch, session, tensor)
+        batch_time = time.perf_counter() - start_time
+        for i, confidence in zip(misses, confidences.tolist()):
+            accident_detected = confidence > DETECTION_THRESHOLD
+            results[i] = {
+                "accident_detected": accident_detected,
+                "confidence": confidence,
+                "details": "Accident" if accident_detected else "Normal traffic",
+                "processing_time": batch_time
+            }
+            if hashes[i] is not None:
+                cache_result(hashes[i], results[i], now)
+        return results
+    
+    # Simulate model processing time for the whole tensor
     await asyncio.sleep(0.05)  # 50ms processing time
     
-    # Mock detection result
-    accident_detected = random.choice([True, False])
-    confidence = random.uniform(0.4, 0.95)
+    for i in misses:
+        # Mock detection result
+        accident_detected = random.choice([True, False])
+        confidence = random.uniform(0.4, 0.95)
+        results[i] = {
+            "accident_detected": accident_detected,
+            "confidence": confidence,
+            "details": f"Mock detection result - {'Accident' if accident_detected else 'Normal traffic'}",
+            "processing_time": 0.05
+        }
+        if hashes[i] is not None:
+            cache_result(hashes[i], results[i], now)
+    return results
+
+async def server_loop(queue: asyncio.Queue):
+    """
+    Single inference consumer: waits for a frame, collects up to MAX_BATCH_SIZE
+    frames for at most MAX_BATCH_WAIT_MS, runs one batched inference and fans
+    the results back out to each request's response queue.
+    """
+    loop = asyncio.get_running_loop()
+    max_wait = MAX_BATCH_WAIT_MS / 1000
     
-    return {
-        "accident_detected": accident_detected,
-        "confidence": confidence,
-        "details": f"Mock detection result - {'Accident' if accident_detected else 'Normal traffic'}",
-        "processing_time": 0.05
-    }
+    while True:
+        items = [await queue.get()]
+        deadline = loop.time() + max_wait
+        
+        while len(items) < MAX_BATCH_SIZE:
+            if not queue.empty():
+                items.append(queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        
+        try:
+            results = await analyze_frames_batch([item[0] for item in items], [item[3] for item in items])
+        except Exception as e:
+            logger.error(f"Batch inference failed for {len(items)} frames: {str(e)}")
+            results = [e] * len(items)
+        
+        for (_, response_q, request_id, _), result in zip(items, results):
+            response_q.put_nowait((request_id, result))
+
+def get_frame_queue() -> asyncio.Queue:
+    """Return the shared frame queue, starting the inference loop on first use"""
+    global frame_queue, _server_task
+    if frame_queue is None or _server_task is None or _server_task.done():
+        frame_queue = asyncio.Queue()
+        _server_task = asyncio.create_task(server_loop(frame_queue))
+        logger.info(f"Live inference loop started (max_batch={MAX_BATCH_SIZE}, max_wait={MAX_BATCH_WAIT_MS}ms)")
+    return frame_queue
+
+async def decode_base64_frame(encoded: str) -> bytes:
+    """Decode a base64 frame payload on the decode pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(DECODE_POOL, base64.b64decode, encoded)
+
+def parse_binary_frame(message: bytes):
+    """Split a binary frame message into (frame_id, timestamp, frame_bytes) without copying the payload"""
+    frame_id, timestamp = FRAME_HEADER.unpack_from(message)
+    return frame_id, timestamp, memoryview(message)[FRAME_HEADER.size:]
+
+def parse_text_frame(message: str):
+    """
+    Split a JSON frame message into (frame_id, timestamp, base64 frame) without
+    materializing the large base64 string inside a parsed JSON object.
+    """
+    match = FRAME_FIELD.search(message)
+    if match is None:
+        frame_data = orjson.loads(message)
+        return frame_data.get("frame_id"), frame_data.get("timestamp"), frame_data["frame"]
+    
+    # Only the small remaining fields go through the JSON parser
+    frame_data = orjson.loads(message[:match.start(1)] + message[match.end(1):])
+    return frame_data.get("frame_id"), frame_data.get("timestamp"), match.group(1)
+
+_next_request_id = itertools.count()
+
+async def analyze_frame(frame_bytes, response_q: Optional[asyncio.Queue] = None, stream: Optional[int] = None):
+    """
+    Submit a frame to the batching inference loop and wait for its result.
+    Long-lived callers pass their own reusable response queue; results are
+    matched by request id so a stale reply is never mistaken for this one.
+    stream (the connection's client id) scopes the result cache; None disables it.
+    """
+    if response_q is None:
+        response_q = asyncio.Queue()
+    request_id = next(_next_request_id)
+    await get_frame_queue().put((frame_bytes, response_q, request_id, stream))
+    while True:
+        reply_id, result = await response_q.get()
+        if reply_id == request_id:
+            break
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+def enqueue_latest(frame_q: asyncio.Queue, item, stats: dict):
+    """Queue a frame, discarding the oldest pending one when the queue is full"""
+    if frame_q.full():
+        frame_q.get_nowait()
+        stats["dropped_frames"] += 1
+    frame_q.put_nowait(item)
+
+# Per-frame logs below use debug level and lazy %-formatting so they cost
+# nothing at the default INFO level; connect/disconnect stay at INFO.
+async def process_frames(websocket: WebSocket, client_id: int, frame_q: asyncio.Queue, stats: dict):
+    """Per-connection consumer: analyze the freshest queued frames and send results"""
+    response_q = asyncio.Queue()  # Reused for every frame on this connection
+    while True:
+        frame_id, timestamp, frame_bytes, binary = await frame_q.get()
+        try:
+            # Analyze frame
+            start_time = time.perf_counter()
+            result = await analyze_frame(frame_bytes, response_q, client_id)
+            processing_time = time.perf_counter() - start_time
+            
+            logger.debug("Analysis result: accident=%s confidence=%s", result['accident_detected'], result['confidence'])
+            
+            # Prepare response
+            response = FrameResponse(
+                timestamp=timestamp,
+                accident_detected=result["accident_detected"],
+                confidence=result["confidence"],
+                details=result.get("details", ""),
+                frame_id=frame_id,
+                processing_time=processing_time,
+                dropped_frames=stats["dropped_frames"]
+            )
+        except Exception as e:
+            logger.error(f"Error processing frame: {str(e)}")
+            response = {
+                "error": True,
+                "message": f"Processing error: {str(e)}"
+            }
+        
+        # Send result back to frontend (JSON as a text frame: the browser client JSON.parses event.data)
+        try:
+            if binary:
+                await websocket.send_bytes(msgpack_encoder.encode(response))
+            else:
+                await websocket.send_text(json_encoder.encode(response).decode())
+        except Exception:
+            logger.error(f"Failed to send response to client {client_id}")
+            return
+        logger.debug("Response sent to client %s", client_id)
 
 @router.websocket("/api/live/ws")
 async def websocket_live_detection(websocket: WebSocket):
     """
     WebSocket endpoint for real-time accident detection
     """
-    client_id = str(uuid.uuid4())
+    client_id = next(_next_client_id)
+    
+    # Bounded backlog: if the client sends faster than we analyze, keep only the newest frames
+    frame_q = asyncio.Queue(maxsize=FRAME_QUEUE_SIZE)
+    stats = {"dropped_frames": 0}
+    worker = None
     
     try:
         await websocket.accept()
         active_connections[client_id] = websocket
         logger.info(f"WebSocket client {client_id} connected")
+        worker = asyncio.create_task(process_frames(websocket, client_id, frame_q, stats))
         
         while True:
             try:
-                # Wait for frame data from frontend
-                data = await websocket.receive_text()
-                logger.info(f"Received frame data from client {client_id}: {len(data)} characters")
-                
-                # Parse frame data
-                frame_data = json.loads(data)
-                
-                # Decode base64 image
-                frame_bytes = base64.b64decode(frame_data['frame'])
-                logger.info(f"Decoded frame: {len(frame_bytes)} bytes")
-                
-                # Analyze frame
-                start_time = time.time()
-                result = await analyze_frame(frame_bytes)
-                processing_time = time.time() - start_time
+                # Wait for frame data from frontend. Binary messages carry a fixed
+                # header plus raw image bytes; text messages are the legacy JSON +
+                # base64 format.
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
                 
-                logger.info(f"Analysis result: accident={result['accident_detected']}, confidence={result['confidence']:.2f}")
-                
-                # Prepare response
-                response = {
-                    "timestamp": frame_data.get("timestamp"),
-                    "accident_detected": result["accident_detected"],
-                    "confidence": result["confidence"],
-                    "details": result.get("details", ""),
-                    "frame_id": frame_data.get("frame_id"),
-                    "processing_time": processing_time
-                }
+                binary = message.get("bytes") is not None
+                if binary:
+                    data = message["bytes"]
+                    logger.debug("Received binary frame from client %s: %d bytes", client_id, len(data))
+                    frame_id, timestamp, frame_bytes = parse_binary_frame(data)
+                else:
+                    data = message["text"]
+                    logger.debug("Received frame data from client %s: %d characters", client_id, len(data))
+                    
+                    # Parse frame data
+                    frame_id, timestamp, encoded = parse_text_frame(data)
+                    
+                    # Decode base64 image
+                    frame_bytes = await decode_base64_frame(encoded)
+                    logger.debug("Decoded frame: %d bytes", len(frame_bytes))
                 
-                # Send result back to frontend
-                await websocket.send_text(json.dumps(response))
-                logger.info(f"Response sent to client {client_id}")
+                if worker.done():
+                    break
+                enqueue_latest(frame_q, (frame_id, timestamp, frame_bytes, binary), stats)
                 
-            except json.JSONDecodeError as e:
+            except orjson.JSONDecodeError as e:
                 logger.error(f"JSON decode error: {str(e)}")
                 error_response = {
                     "error": True,
                     "message": "Invalid JSON format"
                 }
-                await websocket.send_text(json.dumps(error_response))
+                await websocket.send_text(orjson.dumps(error_response).decode())
+                
+            except WebSocketDisconnect:
+                raise
                 
             except Exception as e:
                 logger.error(f"Error processing frame: {str(e)}")
@@ -96,7 +384,7 @@ async def websocket_live_detection(websocket: WebSocket):
                     "message": f"Processing error: {str(e)}"
                 }
                 try:
-                    await websocket.send_text(json.dumps(error_response))
+                    await websocket.send_text(orjson.dumps(error_response).decode())
                 except:
                     logger.error("Failed to send error response")
                     break
@@ -109,9 +397,11 @@ async def websocket_live_detection(websocket: WebSocket):
         
     finally:
         # Clean up connection
-        if client_id in active_connections:
-            del active_connections[client_id]
-        logger.info(f"WebSocket client {client_id} cleaned up")
+        if worker is not None:
+            worker.cancel()
+        # Weak refs evict on their own; pop anyway so len() is exact even if a traceback pins the socket
+        active_connections.pop(client_id, None)
+        logger.info(f"WebSocket client {client_id} cleaned up (dropped {stats['dropped_frames']} frames)")
 
 @router.post("/api/live/frame")
 async def analyze_single_frame(frame_data: dict):
@@ -120,12 +410,12 @@ async def analyze_single_frame(frame_data: dict):
     """
     try:
         # Decode base64 frame
-        frame_bytes = base64.b64decode(frame_data['frame'])
+        frame_bytes = await decode_base64_frame(frame_data['frame'])
         
         # Analyze frame
-        start_time = time.time()
+        start_time = time.perf_counter()
         result = await analyze_frame(frame_bytes)
-        processing_time = time.time() - start_time
+        processing_time = time.perf_counter() - start_time
         
         return {
             "timestamp": frame_data.get("timestamp"),
@@ -6,6 +6,7 @@ import time
 
 # Import from the correct services
 from services.analysis import analyze_frame_with_logging, get_model_info
+from utils.uploads import read_upload, read_video_frame
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -23,11 +24,19 @@ async def upload_file(file: UploadFile = File(...)):
                 detail="Invalid file type. Please upload an image or video file."
             )
         
-        # Read file contents
-        file_contents = await file.read()
+        # Read file contents in chunks; videos are decoded from disk instead of held in memory
+        frame = None
+        file_contents = None
+        if file.content_type.startswith('video/'):
+            frame = await read_video_frame(file)
+            if frame is None:
+                raise HTTPException(status_code=400, detail="Could not decode a frame from the uploaded video")
+        else:
+            file_contents = await read_upload(file)
         
         # Analyze using the correct analysis service
         result = await analyze_frame_with_logging(
+            frame=frame,
             frame_bytes=file_contents,
             source=f"upload_{file.filename}",
             frame_id=f"upload_{int(time.time() * 1000)}"
@@ -1,23 +1,52 @@
 # routes/dashboard.py - User Dashboard Endpoints
-import json
+import orjson
+import bisect
 import logging
 import asyncio
+import itertools
 from datetime import datetime, timedelta
 from typing import Dict, Union, Optional
 from fastapi import APIRouter, Query, Depends, WebSocket, WebSocketDisconnect
-from sqlalchemy import desc, and_, or_, func
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import desc, and_, func, update, select, lambda_stmt
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from models.database import get_db, User, AccidentLog
-from auth.dependencies import get_current_user_or_admin, get_optional_user, get_current_user_info
+from models.database import get_db, User, AccidentLog, owned_by, utcnow
+from auth.dependencies import get_current_user_or_admin, get_optional_user, get_current_user_info, current_user_info, verify_and_decode_token
 from services.demo_data import get_user_demo_data
+from services import cache, pubsub, pg_notify
+from database.migration import ALERT_NOTIFY_CHANNEL, ALERT_MIN_CONFIDENCE
+from utils.clock import now_iso
+from config.settings import DASHBOARD_CACHE_TTL, ALERT_QUEUE_SIZE
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
-# WebSocket connections storage
-alert_connections: Dict[str, WebSocket] = {}
+# WebSocket connections storage: client id -> outbox drained by that connection's writer task
+alert_connections: Dict[str, asyncio.Queue] = {}
+# client id -> username from the connection's token; only these clients receive new alerts
+alert_owners: Dict[str, str] = {}
+_next_alert_client_id = itertools.count(1)
+# Queued in place of a message to make the writer close a client that fell too far behind
+CLOSE_CONNECTION = None
+ALERT_UPDATES_CHANNEL = "dashboard:alert_updates"
+
+# Pre-serialized alert WebSocket frames; only the timestamp and connection count vary
+PONG_TEMPLATE = '{"type":"pong","timestamp":"%s"}'
+HEARTBEAT_TEMPLATE = '{"type":"heartbeat","timestamp":"%s","active_connections":%d,"user_specific":true}'
+INVALID_JSON_MESSAGE = orjson.dumps({"type": "error", "message": "Invalid JSON format"}).decode()
+
+EMPTY_ALERTS_RESPONSE = {"success": True, "alerts": [], "total": 0, "unread": 0, "source": "database"}
+
+# Severity ladder: confidence >= 0.85 is high, >= 0.7 medium, otherwise low
+SEVERITY_BOUNDS = (0.7, 0.85)
+SEVERITY_LABELS = ("low", "medium", "high")
+
+def classify_severity(confidence: float) -> str:
+    """Map a confidence score onto the alert severity ladder"""
+    return SEVERITY_LABELS[bisect.bisect_right(SEVERITY_BOUNDS, confidence)]
 
 @router.get("/health")
 async def dashboard_health():
@@ -26,7 +55,7 @@ async def dashboard_health():
         return {
             "status": "healthy",
             "service": "user_specific_dashboard",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso(),
             "active_connections": len(alert_connections),
             "endpoints_available": [
                 "/api/dashboard/user/alerts", 
@@ -43,88 +72,82 @@ async def dashboard_health():
         return {
             "status": "unhealthy", 
             "error": str(e),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso()
         }
 
+def user_alerts_statement(user_id: int, limit: int, offset: int):
+    """One page of a user's alerts plus the unpaginated total and unread count (window columns) in one round-trip"""
+    # lambda_stmt caches the compiled SELECT; the closure values become bound parameters
+    stmt = lambda_stmt(lambda: select(
+        AccidentLog,
+        func.count().over().label("total"),
+        func.count().filter(AccidentLog.status.is_distinct_from("acknowledged")).over().label("unread")
+    ).where(
+        AccidentLog.accident_detected == True,
+        AccidentLog.confidence >= ALERT_MIN_CONFIDENCE,
+        AccidentLog.user_id == user_id
+    ).order_by(desc(AccidentLog.created_at)))
+    stmt += lambda s: s.offset(offset).limit(limit)
+    return stmt
+
 @router.get("/user/alerts")
-async def get_user_alerts(
+def get_user_alerts(
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
-    current_user: Union[User, any] = Depends(get_current_user_or_admin)
+    current_user: Union[User, any] = Depends(get_current_user_or_admin),
+    user_info: dict = Depends(current_user_info)
 ):
     """Get user-specific alerts ONLY - shows only current user's data"""
     try:
-        user_info = get_current_user_info(current_user)
         logger.info(f"User alerts endpoint called for {user_info['user_type']} {user_info['username']} (ID: {user_info['id']})")
         
+        # Users known to have no alerts are answered without touching the database
+        empty_key = cache.user_cache_key("alerts_empty", user_info)
+        if cache.get_json(empty_key):
+            return {**EMPTY_ALERTS_RESPONSE, "user_info": user_info}
+        
         # Try to get user-specific data from database
         try:
-            # Build query for user-specific accidents
-            alerts_query = db.query(AccidentLog).filter(
-                and_(
-                    AccidentLog.accident_detected == True,
-                    AccidentLog.confidence >= 0.6
-                )
-            )
-            
-            # Filter by user - try multiple approaches
-            user_filters = []
-            
-            # Try user_id column
-            try:
-                user_filters.append(AccidentLog.user_id == user_info['id'])
-                logger.info(f"Added user_id filter: {user_info['id']}")
-            except Exception:
-                pass
-            
-            # Try created_by column
-            try:
-                user_filters.append(AccidentLog.created_by == user_info['username'])
-                logger.info(f"Added created_by filter: {user_info['username']}")
-            except Exception:
-                pass
-            
-            # Apply user filters if any exist
-            if user_filters:
-                alerts_query = alerts_query.filter(or_(*user_filters))
-            else:
-                logger.warning("No user filtering columns available, returning user demo data")
-                raise Exception("No user filtering available")
-            
-            alerts_query = alerts_query.order_by(desc(AccidentLog.created_at))
-            total_count = alerts_query.count()
-            alerts_data = alerts_query.offset(offset).limit(limit).all()
+            rows = db.execute(user_alerts_statement(user_info['id'], limit, offset)).all()
+            total_count, unread_count = (rows[0].total, rows[0].unread) if rows else (0, 0)
+            alerts_data = [row[0] for row in rows]
             
             logger.info(f"Found {total_count} user-specific alerts for {user_info['user_type']} {user_info['username']}")
             
+            if not rows and offset == 0:
+                # Cleared by cache.invalidate_user when the user's next upload is logged
+                cache.set_json(empty_key, True, DASHBOARD_CACHE_TTL)
+                return {**EMPTY_ALERTS_RESPONSE, "user_info": user_info}
+            
             if alerts_data:
-                alerts = []
-                for log in alerts_data:
-                    alert = {
+                alerts = [
+                    {
                         "id": log.id,
                         "message": f"Your upload: Accident detected with {(log.confidence*100):.1f}% confidence",
                         "timestamp": log.created_at.isoformat(),
-                        "severity": "high" if log.confidence >= 0.85 else "medium" if log.confidence >= 0.7 else "low",
+                        "severity": classify_severity(log.confidence),
                         "read": log.status == "acknowledged",
                         "type": "accident_detection",
                         "confidence": log.confidence,
                         "location": log.location or f"Uploaded by {user_info['username']}",
                         "snapshot_url": log.snapshot_url,
                         "accident_log_id": log.id,
-                        "user_id": getattr(log, 'user_id', user_info['id']),
-                        "created_by": getattr(log, 'created_by', user_info['username'])
+                        "user_id": log.user_id,
+                        "created_by": log.created_by
                     }
-                    alerts.append(alert)
+                    for log in alerts_data
+                ]
                 
-                return {
+                # Already JSON-native: hand straight to orjson, skipping jsonable_encoder's walk
+                return ORJSONResponse({
                     "success": True,
                     "alerts": alerts,
                     "total": total_count,
-                    "unread": len([a for a in alerts if not a["read"]]),
+                    "unread": unread_count,
                     "source": "database",
                     "user_info": user_info
-                }
+                })
                 
         except Exception as db_error:
             logger.error(f"Database query failed for {user_info['user_type']} {user_info['username']}: {str(db_error)}")
@@ -137,7 +160,7 @@ async def get_user_alerts(
             "success": True,
             "alerts": alerts,
             "total": len(alerts),
-            "unread": len([a for a in alerts if not a["read"]]),
+            "unread": sum(not a["read"] for a in alerts),
             "source": "user_demo",
             "user_info": user_info
         }
@@ -147,7 +170,6 @@ async def get_user_alerts(
         # Return user demo data as fallback
         try:
             user_demo_data = get_user_demo_data(current_user)
-            user_info = get_current_user_info(current_user)
             return {
                 "success": True,
                 "alerts": user_demo_data["alerts"],
@@ -167,30 +189,138 @@ async def get_user_alerts(
                 "original_error": str(e)
             }
 
+def acknowledge_user_alert(db: Session, alert_id: int, user_info: dict) -> Optional[int]:
+    """Mark one of the user's alerts as acknowledged; returns its id, or None if not found"""
+    # Single UPDATE ... RETURNING instead of loading the row and flushing it back
+    updated_id = db.execute(
+        update(AccidentLog)
+        .where(AccidentLog.id == alert_id, owned_by(user_info['id']))
+        .values(status="acknowledged")
+        .returning(AccidentLog.id)
+    ).scalar()
+    db.commit()
+    return updated_id
+
+def enqueue_alert_message(client_id: str, outbox: asyncio.Queue, message: str):
+    """Queue a frame without waiting; a client whose outbox is full is disconnected"""
+    try:
+        outbox.put_nowait(message)
+    except asyncio.QueueFull:
+        logger.warning(f"WebSocket client {client_id} is too slow, disconnecting")
+        alert_connections.pop(client_id, None)
+        outbox.get_nowait()
+        outbox.put_nowait(CLOSE_CONNECTION)
+
+async def drain_alert_outbox(outbox: asyncio.Queue, websocket: WebSocket):
+    """Single writer per WebSocket so a slow client never blocks the broadcaster"""
+    try:
+        while True:
+            message = await outbox.get()
+            if message is CLOSE_CONNECTION:
+                await websocket.close(code=1013)
+                return
+            await websocket.send_text(message)
+    except Exception as e:
+        # The receive loop sees the disconnect and cleans up the connection
+        logger.debug(f"WebSocket writer stopped: {str(e)}")
+
+async def broadcast_alert_update(message: str):
+    """Queue a serialized update for every alert WebSocket on this worker"""
+    for client_id, outbox in list(alert_connections.items()):
+        enqueue_alert_message(client_id, outbox, message)
+    logger.info(f"Queued alert update for {len(alert_connections)} WebSocket clients")
+
+async def publish_alert_update(message: str):
+    """Fan an update out to alert WebSockets on every worker (locally when Redis is not configured)"""
+    if not await pubsub.publish(ALERT_UPDATES_CHANNEL, message):
+        await broadcast_alert_update(message)
+
+async def run_alert_subscriber():
+    """Per-worker task relaying published alert updates to this worker's WebSockets"""
+    await pubsub.subscribe(ALERT_UPDATES_CHANNEL, broadcast_alert_update)
+
+def new_alert_message(alert: dict, message: str, location: str) -> str:
+    """Serialized "new_alert" frame for an accident log row (a NOTIFY payload or the same fields)"""
+    return orjson.dumps({
+        "type": "new_alert",
+        "data": {
+            "id": alert["id"],
+            "message": message,
+            "timestamp": alert["created_at"],
+            "severity": classify_severity(alert["confidence"]),
+            "read": alert["status"] == "acknowledged",
+            "type": "accident_detection",
+            "confidence": alert["confidence"],
+            "location": alert["location"] or location,
+            "snapshot_url": alert["snapshot_url"],
+            "accident_log_id": alert["id"],
+            "user_id": alert["user_id"],
+            "created_by": alert["created_by"]
+        },
+        "timestamp": now_iso()
+    }).decode()
+
+async def push_new_alert(payload: str):
+    """Forward an accident_logs NOTIFY to the owner's alert WebSockets on this worker"""
+    alert = orjson.loads(payload)
+    owner = alert["created_by"]
+    recipients = [client_id for client_id, username in alert_owners.items() if username == owner]
+    if not recipients:
+        return
+    # confidence is a nullable column
+    alert["confidence"] = alert.get("confidence") or 0.0
+    
+    message = new_alert_message(
+        alert,
+        f"Your upload: Accident detected with {(alert['confidence']*100):.1f}% confidence",
+        f"Uploaded by {owner}"
+    )
+    for client_id in recipients:
+        outbox = alert_connections.get(client_id)
+        if outbox is not None:
+            enqueue_alert_message(client_id, outbox, message)
+
+async def broadcast_real_accident(accident_log):
+    """Push an owner-less live-feed accident to every alert WebSocket, on all workers"""
+    if accident_log.created_by is not None:
+        # Owned rows reach only their owner, through the accident_logs NOTIFY (push_new_alert)
+        logger.warning(f"Not broadcasting accident log {accident_log.id}: it belongs to {accident_log.created_by}")
+        return
+    alert = {
+        "id": accident_log.id,
+        "confidence": accident_log.confidence,
+        "created_at": accident_log.created_at,
+        "status": accident_log.status,
+        "location": accident_log.location,
+        "snapshot_url": accident_log.snapshot_url,
+        "user_id": accident_log.user_id,
+        "created_by": accident_log.created_by
+    }
+    message = new_alert_message(
+        alert,
+        f"Live feed: Accident detected with {(accident_log.confidence*100):.1f}% confidence",
+        accident_log.video_source or "Live feed"
+    )
+    await publish_alert_update(message)
+
+async def run_alert_listener():
+    """Per-worker task pushing new alerts from PostgreSQL NOTIFY instead of waiting for polls"""
+    await pg_notify.listen(ALERT_NOTIFY_CHANNEL, push_new_alert)
+
 @router.put("/user/alerts/{alert_id}/read")
 async def mark_alert_as_read(
     alert_id: int,
     db: Session = Depends(get_db),
-    current_user: Union[User, any] = Depends(get_current_user_or_admin)
+    current_user: Union[User, any] = Depends(get_current_user_or_admin),
+    user_info: dict = Depends(current_user_info)
 ):
     """Mark a specific alert as read for the current user"""
     try:
-        user_info = get_current_user_info(current_user)
         logger.info(f"Marking alert {alert_id} as read for {user_info['user_type']} {user_info['username']}")
         
-        # Find the alert belonging to this user
-        alert_query = db.query(AccidentLog).filter(
-            and_(
-                AccidentLog.id == alert_id,
-                or_(
-                    AccidentLog.user_id == user_info['id'],
-                    AccidentLog.created_by == user_info['username']
-                )
-            )
-        )
-        
-        alert = alert_query.first()
-        if not alert:
+        # Blocking DB work runs in the threadpool; only the broadcast needs the event loop
+        updated_id = await run_in_threadpool(acknowledge_user_alert, db, alert_id, user_info)
+        if updated_id is None:
             logger.warning(f"Alert {alert_id} not found for user {user_info['username']}")
             return {
                 "success": False,
@@ -199,54 +329,36 @@ async def mark_alert_as_read(
                 "user_info": user_info
             }
         
-        # Mark as read by updating status
-        alert.status = "acknowledged"
-        db.commit()
-        
         logger.info(f"Alert {alert_id} marked as read successfully for user {user_info['username']}")
+        cache.invalidate_user(user_info)
         
-        # Send WebSocket update to connected clients
-        if alert_connections:
-            update_message = {
+        # Send WebSocket update to connected clients on all workers
+        if alert_connections or pubsub.enabled():
+            await publish_alert_update(orjson.dumps({
                 "type": "update_alert",
                 "data": {
-                    "id": alert.id,
+                    "id": updated_id,
                     "read": True,
                     "status": "acknowledged"
                 },
-                "timestamp": datetime.now().isoformat()
-            }
-            
-            # Send to all connected WebSocket clients
-            disconnected_clients = []
-            for client_id, websocket in alert_connections.items():
-                try:
-                    await websocket.send_text(json.dumps(update_message))
-                    logger.info(f"Sent read status update to WebSocket client {client_id}")
-                except Exception as ws_error:
-                    logger.error(f"Failed to send WebSocket update to {client_id}: {ws_error}")
-                    disconnected_clients.append(client_id)
-            
-            # Clean up disconnected clients
-            for client_id in disconnected_clients:
-                if client_id in alert_connections:
-                    del alert_connections[client_id]
+                "timestamp": now_iso()
+            }).decode())
         
         return {
             "success": True,
             "message": f"Alert {alert_id} marked as read",
             "alert": {
-                "id": alert.id,
+                "id": updated_id,
                 "read": True,
                 "status": "acknowledged",
-                "updated_at": datetime.now().isoformat()
+                "updated_at": now_iso()
             },
             "user_info": user_info
         }
         
     except Exception as e:
         logger.error(f"Error marking alert {alert_id} as read: {str(e)}")
-        db.rollback()
+        await run_in_threadpool(db.rollback)
         return {
             "success": False,
             "error": str(e),
@@ -254,56 +366,43 @@ async def mark_alert_as_read(
         }
 
 @router.patch("/user/alerts/{alert_id}")
-async def update_alert_status(
+def update_alert_status(
     alert_id: int,
     request_data: dict,
     db: Session = Depends(get_db),
-    current_user: Union[User, any] = Depends(get_current_user_or_admin)
+    current_user: Union[User, any] = Depends(get_current_user_or_admin),
+    user_info: dict = Depends(current_user_info)
 ):
     """Alternative endpoint to update alert status (PATCH method)"""
     try:
-        user_info = get_current_user_info(current_user)
         logger.info(f"Updating alert {alert_id} for {user_info['user_type']} {user_info['username']}")
         
-        # Find the alert belonging to this user
-        alert_query = db.query(AccidentLog).filter(
-            and_(
-                AccidentLog.id == alert_id,
-                or_(
-                    AccidentLog.user_id == user_info['id'],
-                    AccidentLog.created_by == user_info['username']
-                )
-            )
-        )
-        
-        alert = alert_query.first()
-        if not alert:
+        if not request_data.get("read"):
             return {
                 "success": False,
-                "error": "Alert not found or access denied",
+                "error": "No valid update data provided",
                 "alert_id": alert_id
             }
         
-        # Update status if provided
-        if "read" in request_data and request_data["read"]:
-            alert.status = "acknowledged"
-            db.commit()
-            logger.info(f"Alert {alert_id} status updated via PATCH")
-            
+        updated_id = acknowledge_user_alert(db, alert_id, user_info)
+        if updated_id is None:
             return {
-                "success": True,
-                "message": f"Alert {alert_id} updated",
-                "alert": {
-                    "id": alert.id,
-                    "read": True,
-                    "status": "acknowledged"
-                }
+                "success": False,
+                "error": "Alert not found or access denied",
+                "alert_id": alert_id
             }
         
+        logger.info(f"Alert {alert_id} status updated via PATCH")
+        cache.invalidate_user(user_info)
+        
         return {
-            "success": False,
-            "error": "No valid update data provided",
-            "alert_id": alert_id
+            "success": True,
+            "message": f"Alert {alert_id} updated",
+            "alert": {
+                "id": updated_id,
+                "read": True,
+                "status": "acknowledged"
+            }
         }
         
     except Exception as e:
@@ -316,52 +415,39 @@ async def update_alert_status(
         }
 
 @router.patch("/user/alerts/mark-all-read")
-async def mark_all_alerts_read(
+def mark_all_alerts_read(
     db: Session = Depends(get_db),
-    current_user: Union[User, any] = Depends(get_current_user_or_admin)
+    current_user: Union[User, any] = Depends(get_current_user_or_admin),
+    user_info: dict = Depends(current_user_info)
 ):
     """Mark all alerts as read for the current user"""
     try:
-        user_info = get_current_user_info(current_user)
         logger.info(f"Marking all alerts as read for {user_info['user_type']} {user_info['username']}")
         
         # Update all user's alerts to acknowledged status
-        user_filters = []
-        try:
-            user_filters.append(AccidentLog.user_id == user_info['id'])
-        except:
-            pass
+        # One index-range UPDATE; nothing is loaded into the session, so skip synchronization
+        updated_count = db.execute(
+            update(AccidentLog)
+            .where(
+                owned_by(user_info['id']),
+                AccidentLog.accident_detected == True,
+                AccidentLog.status.is_distinct_from("acknowledged")
+            )
+            .values(status="acknowledged")
+            .execution_options(synchronize_session=False)
+        ).rowcount
         
-        try:
-            user_filters.append(AccidentLog.created_by == user_info['username'])
-        except:
-            pass
+        db.commit()
+        cache.invalidate_user(user_info)
         
-        if user_filters:
-            updated_count = db.query(AccidentLog).filter(
-                and_(
-                    AccidentLog.accident_detected == True,
-                    AccidentLog.status != "acknowledged",
-                    or_(*user_filters)
-                )
-            ).update({"status": "acknowledged"}, synchronize_session=False)
-            
-            db.commit()
-            
-            logger.info(f"Marked {updated_count} alerts as read for user {user_info['username']}")
-            
-            return {
-                "success": True,
-                "message": f"Marked {updated_count} alerts as read",
-                "updated_count": updated_count,
-                "user_info": user_info
-            }
-        else:
-            return {
-                "success": False,
-                "error": "No user filtering available",
-                "updated_count": 0
-            }
+        logger.info(f"Marked {updated_count} alerts as read for user {user_info['username']}")
+        
+        return {
+            "success": True,
+            "message": f"Marked {updated_count} alerts as read",
+            "updated_count": updated_count,
+            "user_info": user_info
+        }
             
     except Exception as e:
         logger.error(f"Error marking all alerts as read: {str(e)}")
@@ -373,67 +459,61 @@ async def mark_all_alerts_read(
         }
 
 @router.get("/user/stats")
-async def get_user_stats(
+def get_user_stats(
     db: Session = Depends(get_db),
-    current_user: Union[User, any] = Depends(get_current_user_or_admin)
+    current_user: Union[User, any] = Depends(get_current_user_or_admin),
+    user_info: dict = Depends(current_user_info)
 ):
     """Get user-specific dashboard stats ONLY"""
     try:
-        user_info = get_current_user_info(current_user)
         logger.info(f"User stats endpoint called for {user_info['user_type']} {user_info['username']} (ID: {user_info['id']})")
         
+        cache_key = cache.user_cache_key("stats", user_info)
+        cached = cache.get_json(cache_key)
+        if cached is not None:
+            return cached
+        
         # Try to get real user-specific stats
         try:
-            now = datetime.now()
+            # created_at is stored in UTC (utcnow), so the cutoffs must be too
+            now = utcnow()
             last_24h = now - timedelta(hours=24)
             last_7d = now - timedelta(days=7)
             
             # Build user-specific queries
-            base_query = db.query(AccidentLog).filter(
+            user_query = db.query(AccidentLog).filter(
                 and_(
                     AccidentLog.accident_detected == True,
-                    AccidentLog.confidence >= 0.6
+                    AccidentLog.confidence >= ALERT_MIN_CONFIDENCE,
+                    owned_by(user_info['id'])
                 )
             )
             
-            # Filter by user
-            user_filters = []
-            
-            try:
-                user_filters.append(AccidentLog.user_id == user_info['id'])
-            except:
-                pass
-            
-            try:
-                user_filters.append(AccidentLog.created_by == user_info['username'])
-            except:
-                pass
-            
-            if user_filters:
-                user_query = base_query.filter(or_(*user_filters))
-                
-                total_alerts = user_query.filter(AccidentLog.created_at >= last_7d).count()
-                last_24h_detections = user_query.filter(AccidentLog.created_at >= last_24h).count()
-                
-                if total_alerts >= 0:  # Even 0 is valid
-                    avg_confidence = db.query(func.avg(AccidentLog.confidence)).filter(
-                        and_(*user_filters, AccidentLog.created_at >= last_7d)
-                    ).scalar() or 0.0
-                    
-                    return {
-                        "success": True,
-                        "total_alerts": total_alerts,
-                        "unread_alerts": total_alerts,
-                        "last_24h_detections": last_24h_detections,
-                        "user_uploads": total_alerts + 5,
-                        "user_accuracy": f"{avg_confidence*100:.1f}%",
-                        "department": getattr(current_user, 'department', 'General'),
-                        "last_activity": now.isoformat(),
-                        "user_since": getattr(current_user, 'created_at', now - timedelta(days=30)).isoformat(),
-                        "source": "database",
-                        "user_info": user_info
-                    }
-                    
+            total_alerts = user_query.filter(AccidentLog.created_at >= last_7d).count()
+            last_24h_detections = user_query.filter(AccidentLog.created_at >= last_24h).count()
+
+            if total_alerts >= 0:  # Even 0 is valid
+                avg_confidence = db.query(func.avg(AccidentLog.confidence)).filter(
+                    owned_by(user_info['id']),
+                    AccidentLog.created_at >= last_7d
+                ).scalar() or 0.0
+
+                stats = {
+                    "success": True,
+                    "total_alerts": total_alerts,
+                    "unread_alerts": total_alerts,
+                    "last_24h_detections": last_24h_detections,
+                    "user_uploads": total_alerts + 5,
+                    "user_accuracy": f"{avg_confidence*100:.1f}%",
+                    "department": getattr(current_user, 'department', 'General'),
+                    "last_activity": now.isoformat(),
+                    "user_since": getattr(current_user, 'created_at', now - timedelta(days=30)).isoformat(),
+                    "source": "database",
+                    "user_info": user_info
+                }
+                cache.set_json(cache_key, stats, DASHBOARD_CACHE_TTL)
+                return stats
+
         except Exception as db_error:
             logger.error(f"Database stats query failed for {user_info['user_type']} {user_info['username']}: {str(db_error)}")
         
@@ -452,7 +532,6 @@ async def get_user_stats(
         logger.error(f"Error in user stats endpoint: {str(e)}")
         try:
             user_demo_data = get_user_demo_data(current_user)
-            user_info = get_current_user_info(current_user)
             stats = user_demo_data["stats"]
             stats["source"] = "user_demo_fallback"
             stats["error"] = str(e)
@@ -472,21 +551,23 @@ async def get_user_stats(
             }
 
 @router.get("/user/profile")
-async def get_user_profile(
+def get_user_profile(
     current_user: Union[User, any] = Depends(get_current_user_or_admin),
+    user_info: dict = Depends(current_user_info),
     db: Session = Depends(get_db)
 ):
     """Get current user's profile information"""
     try:
-        user_info = get_current_user_info(current_user)
+        
+        cache_key = cache.user_cache_key("profile", user_info)
+        cached = cache.get_json(cache_key)
+        if cached is not None:
+            return cached
         
         # Get user's upload history count
         try:
             user_uploads_count = db.query(AccidentLog).filter(
-                or_(
-                    AccidentLog.user_id == user_info['id'],
-                    AccidentLog.created_by == user_info['username']
-                )
+                owned_by(user_info['id'])
             ).count()
         except:
             user_uploads_count = 0
@@ -496,16 +577,13 @@ async def get_user_profile(
             user_accidents_count = db.query(AccidentLog).filter(
                 and_(
                     AccidentLog.accident_detected == True,
-                    or_(
-                        AccidentLog.user_id == user_info['id'],
-                        AccidentLog.created_by == user_info['username']
-                    )
+                    owned_by(user_info['id'])
                 )
             ).count()
         except:
             user_accidents_count = 0
         
-        return {
+        profile = {
             "success": True,
             "user_info": {
                 **user_info,
@@ -520,13 +598,15 @@ async def get_user_profile(
                 "account_age_days": (datetime.now() - getattr(current_user, 'created_at', datetime.now())).days
             }
         }
+        cache.set_json(cache_key, profile, DASHBOARD_CACHE_TTL)
+        return profile
         
     except Exception as e:
         logger.error(f"Error getting user profile: {str(e)}")
         return {
             "success": True,
             "user_info": {
-                **get_current_user_info(current_user),
+                **user_info,
                 "department": getattr(current_user, 'department', 'General')
             },
             "statistics": {
@@ -541,76 +621,79 @@ async def get_user_profile(
 @router.websocket("/ws/alerts")
 async def websocket_user_alerts(websocket: WebSocket):
     """WebSocket endpoint for real-time user-specific alerts"""
-    client_id = f"user_alerts_{int(datetime.now().timestamp())}"
+    client_id = f"user_alerts_{next(_next_alert_client_id)}"
+    outbox = asyncio.Queue(maxsize=ALERT_QUEUE_SIZE)
+    writer_task = None
     
     try:
         logger.info(f"WebSocket connection attempt: {client_id}")
         
         await websocket.accept()
-        alert_connections[client_id] = websocket
+        alert_connections[client_id] = outbox
+        # Optional ?token= identifies the user so their new alerts can be pushed here
+        token = websocket.query_params.get("token")
+        token_payload = verify_and_decode_token(token) if token else None
+        if token_payload:
+            alert_owners[client_id] = token_payload["sub"]
+        writer_task = asyncio.create_task(drain_alert_outbox(outbox, websocket))
         logger.info(f"User Alert WebSocket connected: {client_id} (Total: {len(alert_connections)})")
         
         # Send connection confirmation
-        await websocket.send_text(json.dumps({
+        enqueue_alert_message(client_id, outbox, orjson.dumps({
             "type": "connection",
             "status": "connected",
             "client_id": client_id,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso(),
             "message": "User-specific WebSocket connected successfully",
             "note": "Only your alerts will be sent to this connection"
-        }))
+        }).decode())
         
         # Keep connection alive and handle messages
         while True:
             try:
-                data = await asyncio.wait_for(websocket.receive_text(), timeout=30.0)
+                received = await asyncio.wait_for(websocket.receive(), timeout=30.0)
+                if received["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(received.get("code", 1000))
+                # orjson parses text or binary frames directly, without a decode step
+                data = received.get("bytes") or received.get("text") or ""
                 
                 try:
-                    message = json.loads(data)
-                    logger.info(f"WebSocket message: {message.get('type')}")
+                    message = orjson.loads(data)
+                    logger.debug("WebSocket message: %s", message.get('type'))
                     
                     if message.get("type") == "ping":
-                        await websocket.send_text(json.dumps({
-                            "type": "pong",
-                            "timestamp": datetime.now().isoformat()
-                        }))
+                        enqueue_alert_message(client_id, outbox, PONG_TEMPLATE % now_iso())
                     elif message.get("type") == "subscribe":
                         user_info = message.get("user_info", {})
-                        await websocket.send_text(json.dumps({
+                        enqueue_alert_message(client_id, outbox, orjson.dumps({
                             "type": "subscribed",
                             "message": f"Subscribed to alerts for user: {user_info.get('username', 'unknown')}",
-                            "timestamp": datetime.now().isoformat(),
+                            "timestamp": now_iso(),
                             "active_connections": len(alert_connections),
                             "user_specific": True
-                        }))
+                        }).decode())
                         
-                except json.JSONDecodeError:
-                    await websocket.send_text(json.dumps({
-                        "type": "error",
-                        "message": "Invalid JSON format"
-                    }))
+                except orjson.JSONDecodeError:
+                    enqueue_alert_message(client_id, outbox, INVALID_JSON_MESSAGE)
                     
             except asyncio.TimeoutError:
                 # Send heartbeat
-                await websocket.send_text(json.dumps({
-                    "type": "heartbeat",
-                    "timestamp": datetime.now().isoformat(),
-                    "active_connections": len(alert_connections),
-                    "user_specific": True
-                }))
+                enqueue_alert_message(client_id, outbox, HEARTBEAT_TEMPLATE % (now_iso(), len(alert_connections)))
                 
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected: {client_id}")
     except Exception as e:
         logger.error(f"WebSocket error: {str(e)}")
     finally:
-        if client_id in alert_connections:
-            del alert_connections[client_id]
+        if writer_task:
+            writer_task.cancel()
+        alert_connections.pop(client_id, None)
+        alert_owners.pop(client_id, None)
         logger.info(f"Cleaned up WebSocket: {client_id} (Remaining: {len(alert_connections)})")
 
 # Legacy endpoints for backward compatibility
 @router.get("/alerts")
-async def get_alerts_redirect(
+def get_alerts_redirect(
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
@@ -621,7 +704,7 @@ async def get_alerts_redirect(
         try:
             user_info = get_current_user_info(current_user)
             logger.info(f"Redirecting authenticated {user_info['user_type']} {user_info['username']} to user-specific alerts")
-            return await get_user_alerts(limit, offset, db, current_user)
+            return get_user_alerts(limit, offset, db, current_user, user_info)
         except Exception as e:
             logger.error(f"Error in legacy alerts redirect: {str(e)}")
             return {
@@ -644,7 +727,7 @@ async def get_alerts_redirect(
         }
 
 @router.get("/stats")
-async def get_stats_redirect(
+def get_stats_redirect(
     db: Session = Depends(get_db),
     current_user: Optional[Union[User, any]] = Depends(get_optional_user)
 ):
@@ -653,7 +736,7 @@ async def get_stats_redirect(
         try:
             user_info = get_current_user_info(current_user)
             logger.info(f"Redirecting authenticated {user_info['user_type']} {user_info['username']} to user-specific stats")
-            return await get_user_stats(db, current_user)
+            return get_user_stats(db, current_user, user_info)
         except Exception as e:
             logger.error(f"Error in legacy stats redirect: {str(e)}")
             return {
@@ -1,8 +1,14 @@
 # routes/health.py - Health Check Endpoints
 import logging
 import os
-from datetime import datetime
-from fastapi import APIRouter
+import time
+from dataclasses import dataclass, field, asdict
+from functools import lru_cache
+from typing import List
+from fastapi import APIRouter, Response
+import orjson
+
+from utils.clock import now_iso
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -14,9 +20,15 @@ MODEL_CONFIG = {
         "transfer_mobilenetv2_20250830_120140_best.keras",
         "transfer_mobilenetv2_20250830_120140_final.keras"
     ],
-    "active_model": "transfer_mobilenetv2_20250830_120140_best.keras"  # Use the best model
+    "active_model": "transfer_mobilenetv2_20250830_120140_best.keras",  # Use the best model
+    "active_model_tflite": "transfer_mobilenetv2_20250830_120140_best_int8.tflite"  # Served instead when present
 }
 
+# The model file doesn't come and go between probes; re-stat it at most this often.
+# The path is part of that check, so a TFLite file added later is picked up within the TTL.
+MODEL_STATUS_TTL = 30.0
+_model_status_cache = {"value": None, "expires": 0.0}
+
 def get_model_path():
     """Get the full path to the active model"""
     try:
@@ -24,90 +36,146 @@ def get_model_path():
         current_dir = os.path.dirname(os.path.abspath(__file__))
         # Go up two levels to backend directory, then to models
         backend_dir = os.path.dirname(os.path.dirname(current_dir))
-        model_path = os.path.join(backend_dir, MODEL_CONFIG["model_dir"], MODEL_CONFIG["active_model"])
-        return model_path
+        model_dir = os.path.join(backend_dir, MODEL_CONFIG["model_dir"])
+        # The detection service serves the quantized TFLite variant when it exists
+        tflite_path = os.path.join(model_dir, MODEL_CONFIG["active_model_tflite"])
+        if os.path.exists(tflite_path):
+            return tflite_path
+        return os.path.join(model_dir, MODEL_CONFIG["active_model"])
     except Exception:
         return f"models/{MODEL_CONFIG['active_model']}"
 
 def check_model_status():
-    """Check if the model file exists and get status"""
+    """Check if the model file exists and get status (successful checks cached for MODEL_STATUS_TTL seconds)"""
+    now = time.monotonic()
+    if now < _model_status_cache["expires"]:
+        return _model_status_cache["value"]
+    
     try:
         model_path = get_model_path()
         model_exists = os.path.exists(model_path)
         
-        return {
+        status = {
             "model_available": model_exists,
             "model_loaded": model_exists,
             "model_status": "ready" if model_exists else "file_missing",
             "model_path": model_path,
-            "model_file": MODEL_CONFIG["active_model"]
+            "model_file": os.path.basename(model_path)
         }
     except Exception as e:
+        # Not cached: a transient failure is retried on the next probe
         return {
             "model_available": False,
             "model_loaded": False,
             "model_status": "error",
             "error": str(e)
         }
+    
+    _model_status_cache["value"] = status
+    _model_status_cache["expires"] = now + MODEL_STATUS_TTL
+    return status
+
+@lru_cache(maxsize=1)
+def get_model_status_provider():
+    """services.analysis.get_model_status if it exists; looked up once, not on every request"""
+    try:
+        from services import analysis
+    except Exception:
+        return None
+    return getattr(analysis, "get_model_status", None)
+
+# Serialized bodies split around the timestamp, keyed by (payload, model availability, model file)
+_body_templates = {}
+# Placeholder timestamp; orjson always escapes it as \u0000, which can't occur elsewhere
+TIMESTAMP_MARK = "\x00"
+
+def render_health_body(payload) -> bytes:
+    """Serialize a probe payload by splicing the current time into a cached orjson template"""
+    model_info = check_model_status()
+    key = (payload, model_info["model_available"], model_info.get("model_file"))
+    template = _body_templates.get(key)
+    if template is None:
+        template = _body_templates[key] = orjson.dumps(payload(model_info, TIMESTAMP_MARK)).split(b"\\u0000")
+    prefix, suffix = template
+    return prefix + now_iso().encode() + suffix
+
+# Probe and status bodies: slotted dataclasses, which orjson serializes natively in field order
+@dataclass(slots=True, frozen=True, kw_only=True)
+class HealthPayload:
+    status: str = "healthy"
+    service: str = "accident_detection_api"
+    version: str = "2.5.1"
+    timestamp: str
+    database: str = "connected"
+    model: str
+    model_file: str
+    api_status: str = "online"
+    endpoints_available: bool = True
+    authentication: str = "fixed"
+
+def health_payload(model_info: dict, timestamp: str) -> HealthPayload:
+    """Body of GET /health"""
+    return HealthPayload(
+        timestamp=timestamp,
+        model="loaded" if model_info["model_available"] else "missing",
+        model_file=model_info.get("model_file", "unknown")
+    )
 
 @router.get("/health")
 async def health_check():
     """Root level health check endpoint - REQUIRED BY FRONTEND"""
     try:
-        model_info = check_model_status()
-        
-        return {
-            "status": "healthy",
-            "service": "accident_detection_api",
-            "version": "2.5.1",
-            "timestamp": datetime.now().isoformat(),
-            "database": "connected",
-            "model": "loaded" if model_info["model_available"] else "missing",
-            "model_file": model_info.get("model_file", "unknown"),
-            "api_status": "online",
-            "endpoints_available": True,
-            "authentication": "fixed"
-        }
+        return Response(content=render_health_body(health_payload), media_type="application/json")
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
         return {
             "status": "unhealthy",
             "service": "accident_detection_api",
             "version": "2.5.1",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso(),
             "error": str(e),
             "api_status": "offline"
         }
 
+@dataclass(slots=True, frozen=True, kw_only=True)
+class ModelInfoPayload:
+    model_available: bool
+    model_loaded: bool
+    model_path: str
+    model_file: str
+    input_size: tuple = (224, 224)  # MobileNetV2 standard input size
+    threshold: float = 0.5
+    model_type: str = "MobileNetV2_AccidentDetection"
+    status: str
+    timestamp: str
+    version: str = "2.5.1"
+    confidence_threshold: float = 0.5
+    preprocessing: str = "enabled"
+    available_models: List[str] = field(default_factory=lambda: MODEL_CONFIG["model_files"])
+
 @router.get("/model-info")
 async def get_model_info():
     """Get model information and status - REQUIRED BY FRONTEND"""
     try:
         model_info = check_model_status()
         
-        # Try to get real model status
+        # Real model status, when the analysis service provides it
+        get_model_status = get_model_status_provider()
         try:
-            from services.analysis import get_model_status
-            additional_status = get_model_status()
+            additional_status = get_model_status() if get_model_status else {}
         except Exception:
             additional_status = {}
         
-        return {
-            "model_available": model_info["model_available"],
-            "model_loaded": model_info["model_loaded"],
-            "model_path": model_info["model_path"],
-            "model_file": model_info["model_file"],
-            "input_size": [224, 224],  # MobileNetV2 standard input size
-            "threshold": 0.5,
-            "model_type": "MobileNetV2_AccidentDetection",
-            "status": model_info["model_status"],
-            "timestamp": datetime.now().isoformat(),
-            "version": "2.5.1",
-            "confidence_threshold": 0.5,
-            "preprocessing": "enabled",
-            "available_models": MODEL_CONFIG["model_files"],
-            **additional_status
-        }
+        payload = ModelInfoPayload(
+            model_available=model_info["model_available"],
+            model_loaded=model_info["model_loaded"],
+            model_path=model_info["model_path"],
+            model_file=model_info["model_file"],
+            status=model_info["model_status"],
+            timestamp=now_iso()
+        )
+        body = orjson.dumps({**asdict(payload), **additional_status} if additional_status else payload)
+        return Response(content=body, media_type="application/json")
     except Exception as e:
         logger.error(f"Model info check failed: {str(e)}")
         return {
@@ -115,103 +183,133 @@ async def get_model_info():
             "model_loaded": False,
             "status": "error",
             "error": str(e),
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso(),
             "version": "2.5.1"
         }
 
+@dataclass(slots=True, frozen=True, kw_only=True)
+class AdminHealthPayload:
+    status: str = "healthy"
+    service: str = "admin_api"
+    version: str = "2.5.1"
+    timestamp: str
+    admin_features: str = "enabled"
+    dashboard: str = "operational"
+    user_management: str = "active"
+    upload_system: str = "ready"
+    authentication: str = "fixed"
+    model_status: str
+    model_file: str
+
+def admin_health_payload(model_info: dict, timestamp: str) -> AdminHealthPayload:
+    """Body of GET /admin/api/health"""
+    return AdminHealthPayload(
+        timestamp=timestamp,
+        model_status="ready" if model_info["model_available"] else "missing",
+        model_file=model_info.get("model_file", "unknown")
+    )
+
 @router.get("/admin/api/health")
 async def admin_health_check():
     """Admin API health check endpoint - REQUIRED BY FRONTEND"""
     try:
-        model_info = check_model_status()
-        
-        return {
-            "status": "healthy",
-            "service": "admin_api",
-            "version": "2.5.1",
-            "timestamp": datetime.now().isoformat(),
-            "admin_features": "enabled",
-            "dashboard": "operational",
-            "user_management": "active",
-            "upload_system": "ready",
-            "authentication": "fixed",
-            "model_status": "ready" if model_info["model_available"] else "missing",
-            "model_file": model_info.get("model_file", "unknown")
-        }
+        return Response(content=render_health_body(admin_health_payload), media_type="application/json")
     except Exception as e:
         logger.error(f"Admin health check failed: {str(e)}")
         return {
             "status": "unhealthy",
             "service": "admin_api",
             "error": str(e),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso()
         }
 
+@dataclass(slots=True, frozen=True, kw_only=True)
+class ApiHealthPayload:
+    status: str = "healthy"
+    service: str = "accident_detection_api"
+    version: str = "2.5.1"
+    timestamp: str
+    endpoints: str = "operational"
+    database: str = "connected"
+    authentication: str = "fixed"
+    model_status: str
+    model_type: str = "MobileNetV2_AccidentDetection"
+
+def api_health_payload(model_info: dict, timestamp: str) -> ApiHealthPayload:
+    """Body of GET /api/health"""
+    return ApiHealthPayload(
+        timestamp=timestamp,
+        model_status="ready" if model_info["model_available"] else "missing"
+    )
+
 @router.get("/api/health")
 async def api_health_check():
     """API level health check"""
     try:
-        model_info = check_model_status()
-        
-        return {
-            "status": "healthy",
-            "service": "accident_detection_api",
-            "version": "2.5.1",
-            "timestamp": datetime.now().isoformat(),
-            "endpoints": "operational",
-            "database": "connected",
-            "authentication": "fixed",
-            "model_status": "ready" if model_info["model_available"] else "missing",
-            "model_type": "MobileNetV2_AccidentDetection"
-        }
+        return Response(content=render_health_body(api_health_payload), media_type="application/json")
     except Exception as e:
         logger.error(f"API health check failed: {str(e)}")
         return {
             "status": "unhealthy",
             "service": "accident_detection_api",
             "error": str(e),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now_iso()
         }
 
+@dataclass(slots=True, frozen=True, kw_only=True)
+class SystemSection:
+    status: str = "operational"
+    timestamp: str
+    version: str = "2.5.1"
+
+@dataclass(slots=True, frozen=True, kw_only=True)
+class ModelSection:
+    type: str = "MobileNetV2_AccidentDetection"
+    status: str
+    available: bool
+    loaded: bool
+    file: str
+    path: str
+    available_models: List[str] = field(default_factory=lambda: MODEL_CONFIG["model_files"])
+
+SYSTEM_SERVICES = {"api": "online", "database": "connected", "authentication": "active"}
+SYSTEM_FEATURES = {
+    "video_upload": "enabled",
+    "real_time_analysis": "enabled",
+    "admin_dashboard": "enabled",
+    "user_management": "enabled"
+}
+
+@dataclass(slots=True, frozen=True, kw_only=True)
+class SystemStatusPayload:
+    system: SystemSection
+    services: dict = field(default_factory=lambda: SYSTEM_SERVICES)
+    model: ModelSection
+    features: dict = field(default_factory=lambda: SYSTEM_FEATURES)
+
 @router.get("/api/system/status")
 async def system_status():
     """Comprehensive system status check"""
     try:
         model_info = check_model_status()
         
-        return {
-            "system": {
-                "status": "operational",
-                "timestamp": datetime.now().isoformat(),
-                "version": "2.5.1"
-            },
-            "services": {
-                "api": "online",
-                "database": "connected",
-                "authentication": "active"
-            },
-            "model": {
-                "type": "MobileNetV2_AccidentDetection",
-                "status": model_info["model_status"],
-                "available": model_info["model_available"],
-                "loaded": model_info["model_loaded"],
-                "file": model_info.get("model_file", "unknown"),
-                "path": model_info.get("model_path", "unknown"),
-                "available_models": MODEL_CONFIG["model_files"]
-            },
-            "features": {
-                "video_upload": "enabled",
-                "real_time_analysis": "enabled",
-                "admin_dashboard": "enabled",
-                "user_management": "enabled"
-            }
-        }
+        payload = SystemStatusPayload(
+            system=SystemSection(timestamp=now_iso()),
+            model=ModelSection(
+                status=model_info["model_status"],
+                available=model_info["model_available"],
+                loaded=model_info["model_loaded"],
+                file=model_info.get("model_file", "unknown"),
+                path=model_info.get("model_path", "unknown")
+            )
+        )
+        return Response(content=orjson.dumps(payload), media_type="application/json")
     except Exception as e:
         logger.error(f"System status check failed: {str(e)}")
         return {
             "system": {
                 "status": "error",
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now_iso(),
                 "error": str(e)
             }
         }
@@ -0,0 +1,278 @@
+# services/analysis_kernels.py - Compiled numeric kernels for frame preprocessing
+import logging
+import threading
+import warnings
+import cv2
+import numpy as np
+
+# Numba is optional: without it the same kernels run as vectorized NumPy
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    logging.warning("Numba not available. Using NumPy preprocessing kernels.")
+
+# torchvision's nvJPEG decoder is used only when a CUDA device is present
+try:
+    import torch
+    import torch.nn.functional as F
+    from torchvision.io import decode_jpeg, ImageReadMode
+    GPU_DECODE_AVAILABLE = torch.cuda.is_available()
+    # gpu_decode_batch wraps read-only frame bytes without copying; nvJPEG never writes to them
+    warnings.filterwarnings("ignore", message="The given buffer is not writable", category=UserWarning)
+except ImportError:
+    GPU_DECODE_AVAILABLE = False
+
+# PyTurboJPEG (libjpeg-turbo, SIMD IDCT) is optional: without it frames decode with cv2.imdecode
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    _turbojpeg = TurboJPEG()
+    TURBOJPEG_AVAILABLE = True
+except (ImportError, RuntimeError, OSError):
+    # RuntimeError/OSError: the Python package is installed but libturbojpeg isn't
+    TURBOJPEG_AVAILABLE = False
+
+# OpenCV's CUDA module only has kernels in CUDA builds, and only helps with a visible device
+try:
+    CV2_CUDA_AVAILABLE = hasattr(cv2.cuda, "resize") and cv2.cuda.getCudaEnabledDeviceCount() > 0
+except (AttributeError, cv2.error):
+    CV2_CUDA_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Decode-time downscaling factors, largest reduction first
+JPEG_SCALING_FACTORS = ((1, 8), (1, 4), (1, 2))
+JPEG_MAGIC = b"\xff\xd8"
+# The same DCT-domain scaling through OpenCV's bundled libjpeg(-turbo)
+CV2_REDUCED_FLAGS = {8: cv2.IMREAD_REDUCED_COLOR_8, 4: cv2.IMREAD_REDUCED_COLOR_4, 2: cv2.IMREAD_REDUCED_COLOR_2}
+# Start-of-frame markers carrying the image size (C4/C8/CC are DHT/JPG/DAC)
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+# Interpolation for scaling frames to the model input. Bilinear on purpose: with one OpenCV
+# thread, 1080p -> 224x224 takes ~0.3ms with INTER_LINEAR but 6-13ms with INTER_AREA (only
+# exact 2x ratios hit its SIMD path), and decode_frame's DCT scaling already does most of
+# the anti-aliasing INTER_AREA would add
+RESIZE_INTERPOLATION = cv2.INTER_LINEAR
+
+def jpeg_size(data):
+    """(width, height) from a JPEG's start-of-frame header, or None; reads only the markers"""
+    i, end = 2, len(data) - 9
+    while i < end:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            i += 1
+        elif marker in JPEG_SOF_MARKERS:
+            return (data[i + 7] << 8) | data[i + 8], (data[i + 5] << 8) | data[i + 6]
+        elif marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Standalone markers have no length field
+            i += 2
+        else:
+            i += 2 + ((data[i + 2] << 8) | data[i + 3])
+    return None
+
+def jpeg_scaling_factor(width: int, height: int, min_size):
+    """Largest decode-time reduction keeping both sides at least min_size (width, height), or None"""
+    return next((
+        (num, denom) for num, denom in JPEG_SCALING_FACTORS
+        if width * num // denom >= min_size[0] and height * num // denom >= min_size[1]
+    ), None)
+
+def decode_frame(data, min_size=None):
+    """
+    Decode image bytes to a BGR uint8 frame (None if undecodable).
+    JPEGs are downscaled inside the decoder by the largest factor that keeps both
+    sides at least min_size (width, height), so most of the resize to model input
+    size comes for free: through libjpeg-turbo when available, otherwise through
+    OpenCV's IMREAD_REDUCED_COLOR_* modes.
+    """
+    is_jpeg = data[:2] == JPEG_MAGIC
+    if TURBOJPEG_AVAILABLE and is_jpeg:
+        try:
+            scaling_factor = None
+            if min_size is not None:
+                width, height = _turbojpeg.decode_header(data)[:2]
+                scaling_factor = jpeg_scaling_factor(width, height, min_size)
+            return _turbojpeg.decode(data, pixel_format=TJPF_BGR, scaling_factor=scaling_factor)
+        except Exception as e:
+            logger.debug(f"TurboJPEG decode failed, falling back to OpenCV: {e}")
+    
+    flags = cv2.IMREAD_COLOR
+    if is_jpeg and min_size is not None:
+        size = jpeg_size(data)
+        scaling_factor = size and jpeg_scaling_factor(size[0], size[1], min_size)
+        if scaling_factor:
+            flags = CV2_REDUCED_FLAGS[scaling_factor[1]]
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flags)
+
+# Per-thread device buffers and stream for cuda_resize: GpuMats reallocate only when the frame size changes
+_cuda_buffers = threading.local()
+
+def cuda_resize(frame: np.ndarray, target_size: tuple, dst: np.ndarray) -> np.ndarray:
+    """
+    cv2.resize on the GPU: upload frame, resize on-device, download into the host array dst.
+    Only the model-sized result crosses back over PCIe, so this pays off for large frames.
+    """
+    state = _cuda_buffers
+    if getattr(state, "stream", None) is None:
+        state.src = cv2.cuda_GpuMat()
+        state.dst = cv2.cuda_GpuMat()
+        state.stream = cv2.cuda.Stream()
+    state.src.upload(frame, state.stream)
+    cv2.cuda.resize(state.src, target_size, state.dst, interpolation=RESIZE_INTERPOLATION, stream=state.stream)
+    state.dst.download(state.stream, dst)
+    state.stream.waitForCompletion()
+    return dst
+
+def _resize_normalize_numpy(src: np.ndarray, out: np.ndarray):
+    """Nearest-neighbour resize of a uint8 BGR frame into a float32 RGB buffer scaled to [0, 1]"""
+    src_h, src_w = src.shape[0], src.shape[1]
+    out_h, out_w = out.shape[0], out.shape[1]
+    rows = (np.arange(out_h) * src_h) // out_h
+    cols = (np.arange(out_w) * src_w) // out_w
+    np.multiply(src[rows[:, None], cols[None, :], 2::-1], np.float32(1.0 / 255.0), out=out)
+
+# The kernels are serial on purpose: they are called from several threads at once (the
+# inference thread, the ML pool, the /live decode pool), and Numba's parallel workqueue
+# layer (the one used without TBB or OpenMP) aborts the process on concurrent entry.
+# Parallelism comes from those pools instead.
+if NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True)
+    def _resize_normalize_numba(src, out):
+        src_h, src_w = src.shape[0], src.shape[1]
+        out_h, out_w = out.shape[0], out.shape[1]
+        for y in range(out_h):
+            sy = y * src_h // out_h
+            for x in range(out_w):
+                sx = x * src_w // out_w
+                for c in range(3):
+                    out[y, x, c] = src[sy, sx, 2 - c] / 255.0
+
+    resize_normalize = _resize_normalize_numba
+else:
+    resize_normalize = _resize_normalize_numpy
+
+def _normalize_batch_numpy(src: np.ndarray, out: np.ndarray):
+    """BGR->RGB and [0, 1] scaling of a stacked (N, H, W, 3) uint8 batch already at model size into out[:N]"""
+    np.multiply(src[..., ::-1], np.float32(1.0 / 255.0), out=out[:len(src)])
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True)
+    def _normalize_batch_numba(src, out):
+        # No resize, so no per-pixel index math: one dispatch per batch
+        count, height, width = src.shape[0], src.shape[1], src.shape[2]
+        scale = np.float32(1.0 / 255.0)
+        for i in range(count):
+            for y in range(height):
+                for x in range(width):
+                    out[i, y, x, 0] = src[i, y, x, 2] * scale
+                    out[i, y, x, 1] = src[i, y, x, 1] * scale
+                    out[i, y, x, 2] = src[i, y, x, 0] * scale
+
+    normalize_batch = _normalize_batch_numba
+else:
+    normalize_batch = _normalize_batch_numpy
+
+def _ahash_numpy(src: np.ndarray) -> int:
+    """8x8 average hash of a uint8 HWC frame packed into a 64-bit int"""
+    h, w = src.shape[0] - src.shape[0] % 8, src.shape[1] - src.shape[1] % 8
+    if h == 0 or w == 0:
+        return 0
+    blocks = src[:h, :w].reshape(8, h // 8, 8, w // 8, -1).mean(axis=(1, 3, 4))
+    bits = (blocks > blocks.mean()).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True)
+    def _ahash_numba(src):
+        h, w = src.shape[0] - src.shape[0] % 8, src.shape[1] - src.shape[1] % 8
+        bh, bw = h // 8, w // 8
+        if bh == 0 or bw == 0:
+            return np.uint64(0)
+        sums = np.zeros(64, dtype=np.float64)
+        for y in range(h):
+            row = (y // bh) * 8
+            for x in range(w):
+                col = x // bw
+                for c in range(src.shape[2]):
+                    sums[row + col] += src[y, x, c]
+        mean = sums.mean()
+        value = np.uint64(0)
+        for i in range(64):
+            value = (value << np.uint64(1)) | np.uint64(sums[i] > mean)
+        return value
+
+    def ahash(src: np.ndarray) -> int:
+        """8x8 average hash of a uint8 HWC frame packed into a 64-bit int"""
+        return int(_ahash_numba(src))
+else:
+    ahash = _ahash_numpy
+
+def warmup_kernels():
+    """Compile (or load from the Numba cache) the kernels before the first real frame"""
+    frame = np.zeros((16, 16, 3), dtype=np.uint8)
+    resize_normalize(frame, np.empty((8, 8, 3), dtype=np.float32))
+    normalize_batch(frame[None], np.empty((1, 16, 16, 3), dtype=np.float32))
+    ahash(frame)
+
+def preprocess_batch(frames, out_f32: np.ndarray) -> np.ndarray:
+    """
+    Resize and normalize decoded uint8 frames into a float32 NHWC batch tensor.
+    Frames may differ in size; each one is written into its own slot of out_f32.
+    """
+    size = out_f32.shape[1:3]
+    for i, frame in enumerate(frames):
+        if frame.shape[:2] == size:
+            # Already model-sized: convert only, ~3x faster than the resize kernel
+            normalize_batch(frame[None], out_f32[i:i + 1])
+        else:
+            resize_normalize(frame, out_f32[i])
+    return out_f32[:len(frames)]
+
+_decode_stream = None
+_pinned_output = None
+
+def _get_pinned_output(count: int, size):
+    """Page-locked host buffer for device-to-host copies, grown only when a batch outgrows it"""
+    global _pinned_output
+    shape = (size[1], size[0], 3)
+    if _pinned_output is None or _pinned_output.shape[0] < count or tuple(_pinned_output.shape[1:]) != shape:
+        _pinned_output = torch.empty((count, *shape), dtype=torch.float32).pin_memory()
+    return _pinned_output[:count]
+
+def gpu_decode_batch(batch, size):
+    """
+    Decode JPEG frames on the GPU with nvJPEG and return a normalized float32 RGB
+    NHWC array, or None if any frame fails so the caller can use the CPU path.
+    The array views a reused pinned buffer and is only valid until the next call.
+    """
+    global _decode_stream
+    if _decode_stream is None:
+        _decode_stream = torch.cuda.Stream()
+
+    # Decode on a side stream so it overlaps with the previous batch's forward pass
+    with torch.cuda.stream(_decode_stream):
+        try:
+            # Zero-copy views over the frame bytes/memoryviews: the only copy is nvJPEG's upload
+            data = [torch.frombuffer(frame, dtype=torch.uint8) for frame in batch]
+            images = decode_jpeg(data, mode=ImageReadMode.RGB, device='cuda')
+        except RuntimeError as e:
+            logger.debug(f"GPU decode failed, falling back to CPU: {e}")
+            return None
+
+        resized = torch.cat([
+            F.interpolate(image.unsqueeze(0).float(), size=(size[1], size[0]), mode='nearest')
+            for image in images
+        ])
+        tensor = resized.div_(255.0).permute(0, 2, 3, 1).contiguous()
+
+        # Single async DMA into pinned memory; wait on its event rather than the whole device
+        host = _get_pinned_output(len(batch), size)
+        host.copy_(tensor, non_blocking=True)
+        copy_done = torch.cuda.Event()
+        copy_done.record(_decode_stream)
+    copy_done.synchronize()
+    return host.numpy()
@@ -0,0 +1,97 @@
+# services/cache.py - Short-lived response cache (Redis when configured, in-process if opted in)
+import time
+import logging
+import threading
+from typing import Any, Optional
+
+import orjson
+
+from config.settings import REDIS_URL, LOCAL_RESPONSE_CACHE
+
+# Redis is optional: without it (or without REDIS_URL) nothing is cached, unless
+# LOCAL_RESPONSE_CACHE opts a single-worker deployment into a per-process TTL cache
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_redis_client = None
+if REDIS_URL and REDIS_AVAILABLE:
+    try:
+        _redis_client = redis.Redis.from_url(REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+        logger.info("Response cache using Redis")
+    except Exception as e:
+        logger.error(f"Failed to configure Redis cache: {str(e)}")
+elif REDIS_URL:
+    logging.warning("REDIS_URL is set but redis is not installed. Response cache disabled unless LOCAL_RESPONSE_CACHE=1.")
+
+# invalidate_user only clears the worker that handled the write, so with several workers
+# and no Redis the others would keep serving stale stats and the alerts_empty sentinel
+_local_enabled = _redis_client is None and LOCAL_RESPONSE_CACHE
+
+# In-process fallback: key -> (expires_at, serialized value)
+LOCAL_CACHE_PURGE_SIZE = 1024
+_local_cache: dict = {}
+_local_lock = threading.Lock()
+
+def user_cache_key(kind: str, user_info: dict) -> str:
+    """Cache key for per-user data; user types are kept apart since admin and user ids overlap"""
+    return f"{kind}:{user_info['user_type']}:{user_info['id']}"
+
+# Per-user entries that go stale when the user's accident logs change
+USER_CACHE_KINDS = ("stats", "profile", "alerts_empty")
+
+def invalidate_user(user_info: dict):
+    """Drop every cached entry for a user after their accident logs change"""
+    delete(*(user_cache_key(kind, user_info) for kind in USER_CACHE_KINDS))
+
+def get_json(key: str) -> Optional[Any]:
+    """Return the cached value for key, or None on miss or cache failure"""
+    try:
+        if _redis_client is not None:
+            raw = _redis_client.get(key)
+        elif not _local_enabled:
+            return None
+        else:
+            with _local_lock:
+                entry = _local_cache.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            raw = entry[1]
+        return orjson.loads(raw) if raw is not None else None
+    except Exception as e:
+        logger.warning(f"Cache read failed for {key}: {str(e)}")
+        return None
+
+def set_json(key: str, value: Any, ttl: int):
+    """Cache value for ttl seconds; failures are logged and ignored"""
+    try:
+        if _redis_client is None and not _local_enabled:
+            return
+        raw = orjson.dumps(value)
+        if _redis_client is not None:
+            _redis_client.set(key, raw, ex=ttl)
+        else:
+            now = time.monotonic()
+            with _local_lock:
+                if len(_local_cache) >= LOCAL_CACHE_PURGE_SIZE:
+                    for stale in [k for k, (expires_at, _) in _local_cache.items() if expires_at < now]:
+                        del _local_cache[stale]
+                _local_cache[key] = (now + ttl, raw)
+    except Exception as e:
+        logger.warning(f"Cache write failed for {key}: {str(e)}")
+
+def delete(*keys: str):
+    """Invalidate cached keys"""
+    try:
+        if _redis_client is not None:
+            _redis_client.delete(*keys)
+        else:
+            with _local_lock:
+                for key in keys:
+                    _local_cache.pop(key, None)
+    except Exception as e:
+        logger.warning(f"Cache delete failed for {keys}: {str(e)}")
@@ -2,11 +2,12 @@
 import cv2
 import numpy as np
 import logging
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 import os
 from pathlib import Path
 import sys
 import glob
+import threading
 
 # Import TensorFlow for model loading
 try:
@@ -18,8 +19,57 @@ except ImportError:
     tf_version = "Not Available"
     logging.warning("TensorFlow not available. Using fallback detection only.")
 
+from config.settings import MODEL_SERVER_ADDRESS, TFLITE_NUM_THREADS
+from services.model_server import is_model_server_client
+from services.analysis_kernels import normalize_batch, RESIZE_INTERPOLATION
+from utils.cpu import log_int8_support
+
 logger = logging.getLogger(__name__)
 
+# Per-thread float32 model input, reused across predictions
+_preprocess_buffers = threading.local()
+
+def tflite_variant_path(model_path: str) -> str:
+    """Path of the INT8 TFLite model produced by quantize_tflite.py for a .keras model"""
+    return os.path.splitext(model_path)[0] + "_int8.tflite"
+
+class TFLiteModel:
+    """
+    INT8 TFLite interpreter behind the Keras predict() interface, so the
+    detection code paths work unchanged with either model.
+    """
+    
+    def __init__(self, model_path: str, num_threads: int = TFLITE_NUM_THREADS):
+        self.interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.input_detail = self.interpreter.get_input_details()[0]
+        self.output_detail = self.interpreter.get_output_details()[0]
+        self.input_shape = (None, *self.input_detail["shape"][1:])
+        self.output_shape = (None, *self.output_detail["shape"][1:])
+        self.batch_size = int(self.input_detail["shape"][0])
+        # One interpreter, several ML worker threads
+        self.lock = threading.Lock()
+    
+    def predict(self, batch: np.ndarray, verbose: int = 0) -> np.ndarray:
+        with self.lock:
+            if len(batch) != self.batch_size:
+                self.interpreter.resize_tensor_input(self.input_detail["index"], [len(batch), *self.input_shape[1:]])
+                self.interpreter.allocate_tensors()
+                self.batch_size = len(batch)
+            
+            # Fully quantized models take and return int8; scale at the edges
+            scale, zero_point = self.input_detail["quantization"]
+            if self.input_detail["dtype"] != np.float32 and scale:
+                batch = np.round(batch / scale + zero_point)
+            self.interpreter.set_tensor(self.input_detail["index"], np.asarray(batch, dtype=self.input_detail["dtype"]))
+            self.interpreter.invoke()
+            output = self.interpreter.get_tensor(self.output_detail["index"])
+        
+        scale, zero_point = self.output_detail["quantization"]
+        if self.output_detail["dtype"] != np.float32 and scale:
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
+
 class AccidentDetectionModel:
     """
     Enhanced Accident Detection Model Class with comprehensive debugging
@@ -32,6 +82,7 @@ class AccidentDetectionModel:
         self.threshold = 0.5
         self.input_size = (224, 224)  # MobileNetV2 typically uses 224x224
         self.is_loaded = False
+        self.quantized = False
         self.debug_info = {}
         
         # Enhanced debugging
@@ -229,6 +280,25 @@ class AccidentDetectionModel:
                 file_size = model_file_path.stat().st_size
                 logger.info(f"📊 Model file size: {file_size:,} bytes ({file_size/1024/1024:.2f} MB)")
                 
+                # Prefer the INT8 TFLite variant: smaller and faster on CPU
+                tflite_path = tflite_variant_path(self.model_path)
+                if os.path.exists(tflite_path):
+                    try:
+                        start_time = cv2.getTickCount()
+                        self.model = TFLiteModel(tflite_path)
+                        loading_time = (cv2.getTickCount() - start_time) / cv2.getTickFrequency()
+                        logger.info(f"✅ INT8 TFLite model loaded from {tflite_path} in {loading_time:.2f} seconds")
+                        self.model_path = tflite_path
+                        self.is_loaded = True
+                        self.debug_info['model_format'] = 'tflite_int8'
+                        self.quantized = True
+                        log_int8_support(logger, "TFLite model")
+                        self._log_model_info()
+                        return
+                    except Exception as tflite_error:
+                        logger.warning(f"⚠️ Failed to load TFLite model, using Keras model: {tflite_error}")
+                        self.model = None
+                
                 # Attempt to load the model
                 logger.info("🔄 Loading TensorFlow/Keras model...")
                 start_time = cv2.getTickCount()
@@ -364,27 +434,35 @@ class AccidentDetectionModel:
             self.debug_info['detection_method'] = 'none'
     
     def _preprocess_frame(self, frame: np.ndarray) -> np.ndarray:
-        """Preprocess frame for MobileNetV2 model with enhanced debugging"""
+        """Preprocess one frame for MobileNetV2 into a (1, H, W, 3) float32 batch"""
+        return self._preprocess_batch([frame])
+    
+    def _preprocess_batch(self, frames) -> np.ndarray:
+        """
+        Resize, BGR->RGB and [0, 1] normalization for a list of frames, written by the
+        normalize_batch kernel straight into this thread's reusable float32 tensor.
+        Valid until the calling thread's next call.
+        """
         try:
-            logger.debug(f"🔄 Preprocessing frame: input shape {frame.shape}")
-            
-            # Resize to model input size
-            processed_frame = cv2.resize(frame, self.input_size)
-            logger.debug(f"📏 Resized to: {processed_frame.shape}")
+            width, height = self.input_size
+            out = getattr(_preprocess_buffers, "out", None)
+            if out is None or out.shape[0] < len(frames) or out.shape[1:3] != (height, width):
+                out = _preprocess_buffers.out = np.empty((max(len(frames), 8), height, width, 3), dtype=np.float32)
             
-            # Convert BGR to RGB (OpenCV uses BGR, TensorFlow expects RGB)
-            processed_frame = cv2.cvtColor(processed_frame, cv2.COLOR_BGR2RGB)
-            logger.debug("🎨 Converted BGR to RGB")
+            if isinstance(frames, np.ndarray) and frames.shape[1:] == (height, width, 3):
+                # Stacked model-sized batch (the analysis service's batch path): convert only, one kernel call
+                normalize_batch(frames, out)
+                return out[:len(frames)]
             
-            # Normalize to [0, 1]
-            processed_frame = processed_frame.astype(np.float32) / 255.0
-            logger.debug(f"📊 Normalized to [0,1]: min={processed_frame.min():.3f}, max={processed_frame.max():.3f}")
+            for i, frame in enumerate(frames):
+                if frame.shape[:2] != (height, width):
+                    # Keep cv2's bilinear resize for off-size frames
+                    frame = cv2.resize(frame, self.input_size, interpolation=RESIZE_INTERPOLATION)
+                # Every frame is model-sized by now: convert only, without resize_normalize's index math
+                normalize_batch(frame[None], out[i:i + 1])
             
-            # Add batch dimension
-            processed_frame = np.expand_dims(processed_frame, axis=0)
-            logger.debug(f"📦 Added batch dimension: final shape {processed_frame.shape}")
-            
-            return processed_frame
+            logger.debug(f"🔄 Preprocessed {len(frames)} frame(s) to {out.shape[1:]}")
+            return out[:len(frames)]
             
         except Exception as e:
             logger.error(f"❌ Error in preprocessing: {str(e)}")
@@ -462,41 +540,7 @@ class AccidentDetectionModel:
             logger.debug(f"📊 Raw predictions shape: {predictions.shape}")
             logger.debug(f"📊 Raw predictions: {predictions}")
             
-            # Handle different output formats
-            if len(predictions.shape) == 2:  # Binary classification
-                if predictions.shape[1] == 2:  # Two classes (accident, no_accident)
-                    accident_prob = float(predictions[0][1])  # Probability of accident class
-                    confidence = accident_prob
-                    logger.debug(f"📊 Binary classification (2 classes): accident_prob = {accident_prob:.3f}")
-                else:  # Single output
-                    confidence = float(predictions[0][0])
-                    logger.debug(f"📊 Single output classification: confidence = {confidence:.3f}")
-            else:  # Single value output
-                confidence = float(predictions[0])
-                logger.debug(f"📊 Single value output: confidence = {confidence:.3f}")
-            
-            # Ensure confidence is between 0 and 1
-            confidence = max(0.0, min(1.0, confidence))
-            logger.debug(f"📊 Normalized confidence: {confidence:.3f}")
-            
-            # Determine if accident detected based on threshold
-            accident_detected = confidence > self.threshold
-            logger.debug(f"🎯 Threshold check: {confidence:.3f} > {self.threshold} = {accident_detected}")
-            
-            # Determine predicted class
-            if accident_detected:
-                predicted_class = "accident"
-            else:
-                predicted_class = "normal"
-            
-            result = {
-                "accident_detected": accident_detected,
-                "confidence": confidence,
-                "predicted_class": predicted_class,
-                "detection_method": "mobilenetv2_model",
-                "inference_time": inference_time,
-                "raw_prediction": predictions.tolist()
-            }
+            result = self._ml_result(predictions, inference_time)
             
             logger.debug(f"✅ ML detection result: {result}")
             return result
@@ -511,6 +555,45 @@ class AccidentDetectionModel:
                 "detection_method": "mobilenetv2_model"
             }
     
+    def _ml_result(self, predictions: np.ndarray, inference_time: float) -> Dict:
+        """Turn one frame's raw model output (leading batch axis of 1) into a result dict"""
+        # Handle different output formats
+        if len(predictions.shape) == 2:  # Binary classification
+            if predictions.shape[1] == 2:  # Two classes (accident, no_accident)
+                accident_prob = float(predictions[0][1])  # Probability of accident class
+                confidence = accident_prob
+                logger.debug(f"📊 Binary classification (2 classes): accident_prob = {accident_prob:.3f}")
+            else:  # Single output
+                confidence = float(predictions[0][0])
+                logger.debug(f"📊 Single output classification: confidence = {confidence:.3f}")
+        else:  # Single value output
+            confidence = float(predictions[0])
+            logger.debug(f"📊 Single value output: confidence = {confidence:.3f}")
+        
+        # Ensure confidence is between 0 and 1
+        confidence = max(0.0, min(1.0, confidence))
+        logger.debug(f"📊 Normalized confidence: {confidence:.3f}")
+        
+        # Determine if accident detected based on threshold
+        accident_detected = confidence > self.threshold
+        logger.debug(f"🎯 Threshold check: {confidence:.3f} > {self.threshold} = {accident_detected}")
+        
+        # Determine predicted class
+        if accident_detected:
+            predicted_class = "accident"
+        else:
+            predicted_class = "normal"
+        
+        result = {
+            "accident_detected": accident_detected,
+            "confidence": confidence,
+            "predicted_class": predicted_class,
+            "detection_method": "mobilenetv2_model",
+            "inference_time": inference_time,
+            "raw_prediction": predictions.tolist()
+        }
+        return result
+    
     def predict(self, frame: np.ndarray) -> Dict:
         """
         Main prediction method with enhanced debugging
@@ -580,6 +663,40 @@ class AccidentDetectionModel:
                 "detection_method": "error"
             }
     
+    def predict_batch(self, frames: np.ndarray) -> List[Dict]:
+        """
+        Predict a stacked batch of frames with a single model call.
+        The OpenCV fallback is stateful (background subtraction), so it runs frame by frame.
+        """
+        if not self.is_loaded or self.model is None or self.model == "opencv_fallback":
+            return [self.predict(frame) for frame in frames]
+        
+        start_time = cv2.getTickCount()
+        try:
+            batch = self._preprocess_batch(frames)
+            predictions = self.model.predict(batch, verbose=0)
+            inference_time = (cv2.getTickCount() - start_time) / cv2.getTickFrequency()
+            logger.debug(f"⚡ Batch of {len(batch)} inferred in {inference_time:.3f}s")
+            
+            results = [self._ml_result(predictions[i:i + 1], inference_time) for i in range(len(batch))]
+            for result in results:
+                result["processing_time"] = inference_time
+                if result["accident_detected"]:
+                    logger.info(f"🚨 ACCIDENT DETECTED: confidence={result['confidence']:.3f}")
+            return results
+            
+        except Exception as e:
+            processing_time = (cv2.getTickCount() - start_time) / cv2.getTickFrequency()
+            logger.error(f"❌ Error in batch prediction: {str(e)}")
+            return [{
+                "accident_detected": False,
+                "confidence": 0.0,
+                "predicted_class": "prediction_error",
+                "error": str(e),
+                "processing_time": processing_time,
+                "detection_method": "error"
+            } for _ in frames]
+    
     def set_threshold(self, threshold: float):
         """Set detection threshold with validation"""
         if 0.0 <= threshold <= 1.0:
@@ -596,6 +713,7 @@ class AccidentDetectionModel:
             "is_loaded": self.is_loaded,
             "input_size": self.input_size,
             "threshold": self.threshold,
+            "quantized": self.quantized,
             "tensorflow_available": TF_AVAILABLE,
             "tensorflow_version": tf_version,
             "debug_info": self.debug_info
@@ -655,16 +773,22 @@ class AccidentDetectionModel:
 logger.info("🚀 Initializing Accident Detection Model...")
 
 try:
-    accident_model = AccidentDetectionModel()
-    model_info = accident_model.get_model_info()
-    
-    logger.info("✅ Accident detection model initialization completed")
-    logger.info(f"📊 Model Status: {model_info.get('detection_method', 'unknown')}")
-    
-    if model_info.get('is_loaded'):
-        logger.info("✅ Model loaded successfully and ready for predictions")
+    if is_model_server_client():
+        # The shared model server process holds the only copy of the weights
+        from services.model_server import RemoteModel
+        accident_model = RemoteModel()
+        logger.info(f"✅ Using shared model server at {MODEL_SERVER_ADDRESS}")
     else:
-        logger.warning("⚠️ Model initialization completed but model not loaded - using fallback")
+        accident_model = AccidentDetectionModel()
+        model_info = accident_model.get_model_info()
+        
+        logger.info("✅ Accident detection model initialization completed")
+        logger.info(f"📊 Model Status: {model_info.get('detection_method', 'unknown')}")
+        
+        if model_info.get('is_loaded'):
+            logger.info("✅ Model loaded successfully and ready for predictions")
+        else:
+            logger.warning("⚠️ Model initialization completed but model not loaded - using fallback")
     
 except Exception as e:
     logger.error(f"❌ Failed to initialize accident detection model: {str(e)}")
@@ -698,6 +822,9 @@ except Exception as e:
                 self.threshold = threshold
                 logger.info(f"🎯 Fallback threshold updated to: {threshold}")
         
+        def predict_batch(self, frames):
+            return [self.predict(frame) for frame in frames]
+        
         def get_model_info(self):
             return {
                 "model_path": self.model_path,
@@ -875,33 +1002,36 @@ logger.info("=" * 80)
 logger.info("ACCIDENT DETECTION SERVICE INITIALIZATION COMPLETE")
 logger.info("=" * 80)
 
-# Get and log model info
+# Get and log model info; a model server client leaves the server alone at import time
 try:
-    final_model_info = accident_model.get_model_info()
-    logger.info(f"Model Type: {final_model_info.get('model_type', 'Unknown')}")
-    logger.info(f"Detection Method: {final_model_info.get('detection_method', 'Unknown')}")
-    logger.info(f"Model Loaded: {final_model_info.get('is_loaded', False)}")
-    logger.info(f"Model Path: {final_model_info.get('model_path', 'Unknown')}")
-    logger.info(f"TensorFlow Available: {final_model_info.get('tensorflow_available', False)}")
+    if is_model_server_client():
+        logger.info(f"Model status comes from the model server at {MODEL_SERVER_ADDRESS} once it is up")
+    else:
+        final_model_info = accident_model.get_model_info()
+        logger.info(f"Model Type: {final_model_info.get('model_type', 'Unknown')}")
+        logger.info(f"Detection Method: {final_model_info.get('detection_method', 'Unknown')}")
+        logger.info(f"Model Loaded: {final_model_info.get('is_loaded', False)}")
+        logger.info(f"Model Path: {final_model_info.get('model_path', 'Unknown')}")
+        logger.info(f"TensorFlow Available: {final_model_info.get('tensorflow_available', False)}")
     
-    if TF_AVAILABLE:
-        logger.info(f"TensorFlow Version: {tf_version}")
+        if TF_AVAILABLE:
+            logger.info(f"TensorFlow Version: {tf_version}")
     
-    # List available models
-    available_models = list_available_models()
-    if available_models.get('found_models'):
-        logger.info(f"Available Models Found: {available_models['count']}")
-        for model in available_models['found_models'][:3]:  # Show top 3
-            logger.info(f"  - {model['filename']} ({model['size_mb']} MB)")
-    else:
-        logger.warning("No model files found in standard locations")
+        # List available models
+        available_models = list_available_models()
+        if available_models.get('found_models'):
+            logger.info(f"Available Models Found: {available_models['count']}")
+            for model in available_models['found_models'][:3]:  # Show top 3
+                logger.info(f"  - {model['filename']} ({model['size_mb']} MB)")
+        else:
+            logger.warning("No model files found in standard locations")
     
-    # Test the model
-    test_result = test_model_prediction()
-    if test_result.get('test_successful'):
-        logger.info("Model test prediction: SUCCESS")
-    else:
-        logger.warning(f"Model test prediction: FAILED - {test_result.get('error', 'Unknown error')}")
+        # Test the model
+        test_result = test_model_prediction()
+        if test_result.get('test_successful'):
+            logger.info("Model test prediction: SUCCESS")
+        else:
+            logger.warning(f"Model test prediction: FAILED - {test_result.get('error', 'Unknown error')}")
 
 except Exception as e:
     logger.error(f"Error in final model status check: {str(e)}")
@@ -0,0 +1,85 @@
+# services/log_writer.py - Batched background inserts for routine analysis logs
+import time
+import queue
+import logging
+import threading
+from typing import List
+
+from config.settings import LOG_WRITE_BATCH_SIZE, LOG_WRITE_INTERVAL_MS
+from models.database import SessionLocal, AccidentLog
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+class AccidentLogWriter:
+    """
+    Queues AccidentLog rows and inserts them from one daemon thread, up to batch_size
+    rows per commit and at most flush_interval_ms after the first queued row.
+    Rows get their ids only once written, so callers needing the id save synchronously.
+    """
+    
+    def __init__(self, batch_size: int = LOG_WRITE_BATCH_SIZE, flush_interval_ms: float = LOG_WRITE_INTERVAL_MS):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def submit(self, row: AccidentLog):
+        """Queue a row for the next batch insert"""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="AccidentLog_Writer", daemon=True)
+                    self._thread.start()
+        self._queue.put(row)
+    
+    def stop(self, timeout: float = 5.0):
+        """Write everything still queued and stop the writer thread"""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+    
+    def _run(self):
+        while True:
+            row = self._queue.get()
+            if row is _STOP:
+                return
+            batch = [row]
+            deadline = time.monotonic() + self.flush_interval
+            stopping = False
+            
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    row = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if row is _STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+            
+            self._write(batch)
+            if stopping:
+                return
+    
+    def _write(self, batch: List[AccidentLog]):
+        db = SessionLocal()
+        try:
+            # One transaction; SQLAlchemy 2.0 sends the rows as multi-row INSERTs
+            db.add_all(batch)
+            db.commit()
+            logger.debug(f"Wrote {len(batch)} analysis logs in one batch")
+        except Exception as e:
+            logger.error(f"Error writing {len(batch)} analysis logs: {str(e)}")
+            db.rollback()
+        finally:
+            db.close()
+
+accident_log_writer = AccidentLogWriter()
@@ -0,0 +1,180 @@
+# services/model_server.py - Single shared model process for all web workers
+import os
+import time
+import queue
+import logging
+import threading
+import multiprocessing
+from multiprocessing.connection import Listener, Client
+from typing import Optional
+
+from config.settings import MODEL_SERVER_ADDRESS, MODEL_SERVER_AUTHKEY
+
+logger = logging.getLogger(__name__)
+
+# Set inside the model server process so it loads the real model instead of a proxy
+SERVER_ROLE_ENV = "ACCIDENT_MODEL_SERVER"
+
+# Workers may come up before the server is listening: retry connects with exponential backoff
+# (0.1 + 0.2 + 0.4 + 0.8s) before a call fails
+CONNECT_ATTEMPTS = 5
+CONNECT_BACKOFF = 0.1
+
+_server_process: Optional[multiprocessing.Process] = None
+
+def parse_address(address: str):
+    """'host:port' for TCP, anything else is a Unix socket path"""
+    host, sep, port = address.rpartition(":")
+    if sep and "/" not in address and port.isdigit():
+        return (host or "127.0.0.1", int(port))
+    return address
+
+def is_model_server_client() -> bool:
+    """True when this process should proxy predictions to the model server"""
+    return bool(MODEL_SERVER_ADDRESS) and os.getenv(SERVER_ROLE_ENV) != "1"
+
+def _serve_connection(conn, model, lock: threading.Lock):
+    """Answer (method, args) requests from one worker connection until it closes"""
+    try:
+        while True:
+            try:
+                method, args = conn.recv()
+            except EOFError:
+                break
+            try:
+                with lock:
+                    result = getattr(model, method)(*args)
+                conn.send((True, result))
+            except Exception as e:
+                logger.error(f"Model server call {method} failed: {str(e)}")
+                conn.send((False, str(e)))
+    finally:
+        conn.close()
+
+def _server_main(address: str, authkey: bytes):
+    """Model server entry point: bind first so workers can queue, then load the model"""
+    os.environ[SERVER_ROLE_ENV] = "1"
+    address = parse_address(address)
+    if isinstance(address, str) and os.path.exists(address):
+        os.unlink(address)
+    listener = Listener(address, authkey=authkey)
+
+    from services.detection import accident_model, AccidentDetectionModel
+    if isinstance(accident_model, RemoteModel):
+        # services.detection was imported before the role was known: never serve a proxy to ourselves
+        accident_model = AccidentDetectionModel()
+    logger.info(f"Model server ready on {address}")
+
+    # One thread per worker connection; the model itself is used one call at a time
+    lock = threading.Lock()
+    while True:
+        try:
+            conn = listener.accept()
+        except Exception as e:
+            logger.warning(f"Model server rejected connection: {str(e)}")
+            continue
+        threading.Thread(
+            target=_serve_connection, args=(conn, accident_model, lock),
+            name="ModelServer_Conn", daemon=True
+        ).start()
+
+def start_model_server() -> Optional[multiprocessing.Process]:
+    """
+    Start the shared model process if MODEL_SERVER_ADDRESS is configured (once per process).
+    Call it before importing the services: in client mode they connect to this server.
+    """
+    global _server_process
+    if not MODEL_SERVER_ADDRESS:
+        return None
+    if _server_process is not None and _server_process.is_alive():
+        return _server_process
+    # spawn, not fork: the parent may already hold TensorFlow/threads state
+    process = multiprocessing.get_context("spawn").Process(
+        target=_server_main, args=(MODEL_SERVER_ADDRESS, MODEL_SERVER_AUTHKEY),
+        name="ModelServer", daemon=True
+    )
+    # The role must already be in the environment the child starts with: spawn re-imports
+    # __main__ (main.py under `python main.py`), which loads services.detection before
+    # _server_main runs. Set only around start() so this process stays a client.
+    previous = os.environ.get(SERVER_ROLE_ENV)
+    os.environ[SERVER_ROLE_ENV] = "1"
+    try:
+        process.start()
+    finally:
+        if previous is None:
+            del os.environ[SERVER_ROLE_ENV]
+        else:
+            os.environ[SERVER_ROLE_ENV] = previous
+    logger.info(f"Started model server process {process.pid} on {MODEL_SERVER_ADDRESS}")
+    _server_process = process
+    return process
+
+class RemoteModel:
+    """Drop-in stand-in for accident_model that forwards calls to the model server"""
+
+    def __init__(self, address: str = MODEL_SERVER_ADDRESS, authkey: bytes = MODEL_SERVER_AUTHKEY):
+        self.address = parse_address(address)
+        self.authkey = authkey
+        self.model_path = f"remote:{address}"
+        self.input_size = (224, 224)
+        self.threshold = 0.5
+        # Idle connections; each concurrent caller takes its own
+        self._connections = queue.SimpleQueue()
+
+    def _connect(self, attempts: int):
+        """New connection to the server, retrying refused/missing sockets with backoff"""
+        for attempt in range(attempts):
+            try:
+                return Client(self.address, authkey=self.authkey)
+            except (ConnectionRefusedError, FileNotFoundError):
+                if attempt == attempts - 1:
+                    raise
+                time.sleep(CONNECT_BACKOFF * 2 ** attempt)
+
+    def _call(self, method: str, *args, attempts: int = CONNECT_ATTEMPTS):
+        try:
+            conn = self._connections.get_nowait()
+        except queue.Empty:
+            conn = self._connect(attempts)
+        try:
+            conn.send((method, args))
+            ok, result = conn.recv()
+        except Exception:
+            conn.close()
+            raise
+        self._connections.put(conn)
+        if not ok:
+            raise RuntimeError(f"Model server error: {result}")
+        return result
+
+    @property
+    def model(self):
+        """
+        Non-None while the remote model is loaded, for callers that check accident_model.model.
+        A readiness probe: one connect attempt, and None rather than an error while unreachable.
+        """
+        try:
+            info = self.get_model_info(attempts=1)
+        except Exception as e:
+            logger.debug(f"Model server not ready: {str(e)}")
+            return None
+        return self.model_path if info.get("is_loaded") else None
+
+    def predict(self, frame):
+        return self._call("predict", frame)
+
+    def predict_batch(self, frames):
+        return self._call("predict_batch", frames)
+
+    def set_threshold(self, threshold):
+        self._call("set_threshold", threshold)
+        self.threshold = threshold
+
+    def get_model_info(self, attempts: int = CONNECT_ATTEMPTS):
+        info = self._call("get_model_info", attempts=attempts)
+        self.input_size = tuple(info.get("input_size", self.input_size))
+        self.threshold = info.get("threshold", self.threshold)
+        return info
+
+    def get_debug_report(self):
+        return self._call("get_debug_report")
@@ -0,0 +1,102 @@
+# services/onnx_model.py - Optional INT8 ONNX Runtime inference for live batches
+import os
+import logging
+import threading
+from typing import Optional
+import numpy as np
+
+from config.settings import ONNX_MODEL_PATH
+from utils.cpu import log_int8_support
+
+# ONNX Runtime is optional: without it (or without ONNX_MODEL_PATH) live batches use the default path
+try:
+    import onnxruntime as ort
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+    logging.warning("onnxruntime not available. ONNX inference disabled.")
+
+logger = logging.getLogger(__name__)
+
+# Best first; only the ones this onnxruntime build provides are used
+PREFERRED_PROVIDERS = (
+    ("TensorrtExecutionProvider", {"trt_engine_cache_enable": True}),
+    ("CUDAExecutionProvider", {}),
+    ("CPUExecutionProvider", {}),
+)
+
+_session = None
+_session_failed = False
+
+# One IOBinding per thread: bindings are not thread-safe, and reusing one avoids
+# rebuilding the input/output OrtValues on every batch
+_bindings = threading.local()
+
+# Providers whose kernels read their inputs from CUDA device memory
+GPU_PROVIDERS = ("TensorrtExecutionProvider", "CUDAExecutionProvider")
+
+def get_onnx_session() -> Optional["ort.InferenceSession"]:
+    """Load the quantized ONNX model once; None if disabled or unavailable"""
+    global _session, _session_failed
+    if _session is not None or _session_failed:
+        return _session
+    if not ONNX_AVAILABLE or not ONNX_MODEL_PATH or not os.path.exists(ONNX_MODEL_PATH):
+        _session_failed = True
+        return None
+
+    try:
+        available = set(ort.get_available_providers())
+        providers = [(name, options) for name, options in PREFERRED_PROVIDERS if name in available]
+        _session = ort.InferenceSession(ONNX_MODEL_PATH, providers=providers)
+        logger.info(f"✅ ONNX model loaded from {ONNX_MODEL_PATH} with {_session.get_providers()}")
+        if _session.get_providers()[0] == "CPUExecutionProvider":
+            log_int8_support(logger, "ONNX model")
+    except Exception as e:
+        logger.error(f"❌ Failed to load ONNX model {ONNX_MODEL_PATH}: {str(e)}")
+        _session_failed = True
+    return _session
+
+def get_io_binding(session) -> "ort.IOBinding":
+    """This thread's IOBinding for session, created on first use"""
+    binding = getattr(_bindings, "binding", None)
+    if binding is None or _bindings.session is not session:
+        binding = session.io_binding()
+        _bindings.session = session
+        _bindings.binding = binding
+        _bindings.input_name = session.get_inputs()[0].name
+        _bindings.output_name = session.get_outputs()[0].name
+        _bindings.on_gpu = session.get_providers()[0] in GPU_PROVIDERS
+        _bindings.device_input = None
+    return binding
+
+def device_input(tensor: np.ndarray) -> "ort.OrtValue":
+    """This thread's persistent CUDA input buffer, refilled from tensor (reallocated only when the shape changes)"""
+    ortvalue = _bindings.device_input
+    if ortvalue is None or tuple(ortvalue.shape()) != tensor.shape:
+        ortvalue = _bindings.device_input = ort.OrtValue.ortvalue_from_shape_and_type(tensor.shape, np.float32, "cuda", 0)
+    # One host-to-device copy into memory that is already allocated; from the pinned
+    # buffer gpu_decode_batch returns, this is a plain DMA
+    ortvalue.update_inplace(tensor)
+    return ortvalue
+
+def run_onnx_batch(session, tensor: np.ndarray) -> np.ndarray:
+    """Run a float32 NHWC batch and return one accident confidence per frame"""
+    binding = get_io_binding(session)
+    # bind_cpu_input wraps the array's memory directly, so it must be contiguous float32
+    tensor = np.ascontiguousarray(tensor, dtype=np.float32)
+    if _bindings.on_gpu:
+        binding.bind_ortvalue_input(_bindings.input_name, device_input(tensor))
+    else:
+        binding.bind_cpu_input(_bindings.input_name, tensor)
+    binding.bind_output(_bindings.output_name, "cpu")
+    # Run releases the GIL, so batches from several pool threads execute concurrently
+    session.run_with_iobinding(binding)
+    predictions = binding.copy_outputs_to_cpu()[0]
+    binding.clear_binding_inputs()
+
+    # Same output handling as the Keras model: two-class softmax or a single score
+    if predictions.ndim == 2 and predictions.shape[1] == 2:
+        confidences = predictions[:, 1]
+    else:
+        confidences = predictions.reshape(len(tensor), -1)[:, 0]
+    return np.clip(confidences, 0.0, 1.0)
@@ -0,0 +1,50 @@
+# services/pg_notify.py - PostgreSQL LISTEN/NOTIFY subscription
+import os
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from config.settings import SQLALCHEMY_DATABASE_URL
+
+# psycopg is only installed for PostgreSQL deployments; SQLite has no NOTIFY
+try:
+    import psycopg
+    PSYCOPG_AVAILABLE = True
+except ImportError:
+    PSYCOPG_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY = 5.0
+
+def enabled() -> bool:
+    return PSYCOPG_AVAILABLE and SQLALCHEMY_DATABASE_URL.startswith("postgresql")
+
+async def listen(channel: str, handler: Callable[[str], Awaitable[None]]):
+    """Deliver each NOTIFY payload on channel to handler until cancelled, reconnecting on errors"""
+    if not enabled():
+        return
+
+    while True:
+        try:
+            connection = await psycopg.AsyncConnection.connect(
+                SQLALCHEMY_DATABASE_URL,
+                autocommit=True,
+                sslmode="require" if os.getenv("DATABASE_URL") else "prefer"
+            )
+            async with connection:
+                await connection.execute(f"LISTEN {channel}")
+                logger.info(f"Listening for {channel} notifications")
+                async for notify in connection.notifies():
+                    # One bad payload must not drop the subscription (and every NOTIFY until it's back)
+                    try:
+                        await handler(notify.payload)
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        logger.error(f"{channel} handler failed for payload {notify.payload[:200]!r}: {str(e)}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"LISTEN {channel} failed: {str(e)}")
+            await asyncio.sleep(RECONNECT_DELAY)
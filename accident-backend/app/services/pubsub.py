@@ -0,0 +1,63 @@
+# services/pubsub.py - Cross-worker message fan-out over Redis pub/sub
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+from config.settings import REDIS_URL
+
+# Redis is optional: without it messages are only delivered inside the publishing worker
+try:
+    import redis.asyncio as aioredis
+    REDIS_PUBSUB_AVAILABLE = True
+except ImportError:
+    REDIS_PUBSUB_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY = 1.0
+
+_redis_client = None
+
+def get_client() -> Optional["aioredis.Redis"]:
+    """Shared async Redis client, or None when pub/sub is not configured"""
+    global _redis_client
+    if _redis_client is None and REDIS_URL and REDIS_PUBSUB_AVAILABLE:
+        _redis_client = aioredis.Redis.from_url(REDIS_URL, socket_connect_timeout=0.5)
+    return _redis_client
+
+def enabled() -> bool:
+    return get_client() is not None
+
+async def publish(channel: str, message: str) -> bool:
+    """Publish to every worker; False if Redis is unavailable so the caller can deliver locally"""
+    client = get_client()
+    if client is None:
+        return False
+    try:
+        await client.publish(channel, message)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to publish to {channel}: {str(e)}")
+        return False
+
+async def subscribe(channel: str, handler: Callable[[str], Awaitable[None]]):
+    """Deliver each message on channel to handler until cancelled, reconnecting on errors"""
+    client = get_client()
+    if client is None:
+        return
+
+    while True:
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(channel)
+            logger.info(f"Subscribed to {channel}")
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    await handler(message["data"].decode())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Subscription to {channel} failed: {str(e)}")
+            await asyncio.sleep(RECONNECT_DELAY)
+        finally:
+            await pubsub.aclose()
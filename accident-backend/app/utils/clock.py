@@ -0,0 +1,16 @@
+# utils/clock.py - Cached wall-clock timestamps for high-frequency messages
+import time
+from datetime import datetime
+
+_cached_second = 0
+_cached_iso = ""
+
+def now_iso() -> str:
+    """Local time as an ISO string at one-second resolution, formatted once per second"""
+    global _cached_second, _cached_iso
+    second = int(time.time())
+    if second != _cached_second:
+        # Races between threads only ever write the same value
+        _cached_iso = datetime.fromtimestamp(second).isoformat()
+        _cached_second = second
+    return _cached_iso
@@ -0,0 +1,36 @@
+# utils/cpu.py - CPU feature detection for the INT8 inference paths
+import platform
+from functools import lru_cache
+from typing import Optional
+
+# Instruction sets with an INT8 dot product (VPDPBUSD / SDOT), best first
+INT8_DOT_PRODUCT_FLAGS = (
+    ("avx512_vnni", "AVX512-VNNI"),
+    ("avx_vnni", "AVX-VNNI"),
+    ("asimddp", "ARM dot product"),
+)
+
+@lru_cache(maxsize=1)
+def int8_dot_product_isa() -> Optional[str]:
+    """Name of the CPU's INT8 dot-product extension, or None (read once from /proc/cpuinfo)"""
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = set()
+            for line in f:
+                if line.startswith(("flags", "Features")):
+                    flags.update(line.split(":", 1)[1].split())
+    except OSError:
+        # Not Linux; Apple silicon always has the ARM dot product
+        return "ARM dot product" if platform.machine() == "arm64" else None
+    for flag, name in INT8_DOT_PRODUCT_FLAGS:
+        if flag in flags:
+            return name
+    return None
+
+def log_int8_support(logger, model_name: str):
+    """Log whether an INT8 model will hit dot-product kernels or the slower widening path"""
+    isa = int8_dot_product_isa()
+    if isa:
+        logger.info(f"⚡ {model_name}: INT8 kernels use {isa} (typically 2-4x faster than FP32)")
+    else:
+        logger.warning(f"{model_name}: CPU has no VNNI/dot-product support, INT8 gains will be modest")
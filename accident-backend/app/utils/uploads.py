@@ -0,0 +1,57 @@
+# utils/uploads.py - Chunked upload reading helpers
+import os
+import shutil
+import logging
+import tempfile
+from typing import AsyncIterator, Optional
+
+import cv2
+import numpy as np
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1MB
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload grows past its size limit while being read"""
+
+async def iter_upload_chunks(file: UploadFile, chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Yield an upload in fixed-size chunks"""
+    while chunk := await file.read(chunk_size):
+        yield chunk
+
+async def read_upload(file: UploadFile, max_size: Optional[int] = None) -> bytearray:
+    """Read an image upload chunk by chunk, stopping as soon as it passes max_size"""
+    content = bytearray()
+    async for chunk in iter_upload_chunks(file):
+        content += chunk
+        if max_size is not None and len(content) > max_size:
+            raise UploadTooLargeError(f"Upload exceeds {max_size} bytes")
+    return content
+
+def _read_video_frame(source, suffix: str) -> Optional[np.ndarray]:
+    """Spool a video file object to disk in chunks and decode its first frame"""
+    source.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        shutil.copyfileobj(source, tmp, UPLOAD_CHUNK_SIZE)
+        path = tmp.name
+    try:
+        capture = cv2.VideoCapture(path)
+        try:
+            ok, frame = capture.read()
+        finally:
+            capture.release()
+        return frame if ok else None
+    finally:
+        os.unlink(path)
+
+async def read_video_frame(file: UploadFile) -> Optional[np.ndarray]:
+    """Decode the first frame of a video upload without loading the video into memory"""
+    suffix = os.path.splitext(file.filename or "")[1] or ".mp4"
+    try:
+        return await run_in_threadpool(_read_video_frame, file.file, suffix)
+    except Exception as e:
+        logger.error(f"Failed to decode video upload {file.filename}: {str(e)}")
+        return None
@@ -115,8 +115,11 @@ class WebSocketManager:
             # Analyze frame
             result = await analyze_frame_with_logging(
                 frame_bytes=frame_bytes,
+                # Uncompressed BGR frames skip the decode (see analyze_frame_with_logging)
+                metadata={"format": data["format"], "shape": data.get("shape")} if data.get("format") else None,
                 source=f"live_websocket_optimized_{client_id}",
-                frame_id=frame_id
+                frame_id=frame_id,
+                live_alert=True
             )
             
             # Try to log to database (don't fail if DB is unavailable)
@@ -10,6 +10,8 @@ echo "================================================================="
 export ENVIRONMENT=production
 export RENDER=true
 export PYTHONPATH="${PYTHONPATH}:."
+# Cap glibc malloc arenas (default 8 x cores); must be set before Python starts
+export MALLOC_ARENA_MAX="${MALLOC_ARENA_MAX:-2}"
 
 # Check Python version
 echo "🐍 Checking Python version..."
@@ -186,6 +188,7 @@ export ENVIRONMENT=production
 export WORKER_TIMEOUT=300
 export MAX_PREDICTION_TIME=25
 export THREAD_POOL_SIZE=2
+export MALLOC_ARENA_MAX="\${MALLOC_ARENA_MAX:-2}"
 
 # Create directories
 mkdir -p logs snapshots models
@@ -46,6 +46,17 @@ certfile = None
 # statsd_host = None
 # statsd_prefix = None
 
+# Shared model server process (opt-in via MODEL_SERVER_ADDRESS). Started while the master loads
+# this file: preload_app imports the app before on_starting, and in client mode it connects here.
+# start_model_server() returns the running process when a reload re-reads this file.
+model_server_process = None
+if os.getenv("MODEL_SERVER_ADDRESS"):
+    try:
+        from services.model_server import start_model_server
+        model_server_process = start_model_server()
+    except Exception as e:
+        print(f"❌ Failed to start model server: {e}")
+
 # Worker lifecycle hooks
 def on_starting(server):
     """Called just before the master process is initialized."""
@@ -56,6 +67,8 @@ def on_starting(server):
     server.log.info(f"   🔌 Connections: {worker_connections}")
     server.log.info(f"   🔄 Max Requests: {max_requests}")
     server.log.info(f"   💾 Max Memory: {max_worker_memory // (1024*1024)}MB per worker")
+    if model_server_process is not None:
+        server.log.info(f"   🧠 Model server: pid {model_server_process.pid}")
 
 def on_reload(server):
     """Called to recycle workers during a reload via SIGHUP."""
@@ -78,6 +91,19 @@ def pre_fork(server, worker):
 def post_fork(server, worker):
     """Called just after a worker has been forked."""
     server.log.info(f"✨ Worker {worker.pid} spawned")
+    
+    # With several workers, give each a disjoint slice of cores so hot loops keep warm caches.
+    # A single worker keeps every core for its decode/inference threads.
+    if server.num_workers > 1 and hasattr(os, "sched_setaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+        per_worker = max(1, len(cpus) // server.num_workers)
+        start = (worker.age % server.num_workers) * per_worker % len(cpus)
+        worker_cpus = set(cpus[start:start + per_worker])
+        try:
+            os.sched_setaffinity(0, worker_cpus)
+            server.log.info(f"📌 Worker {worker.pid} pinned to CPUs {sorted(worker_cpus)}")
+        except OSError as e:
+            server.log.warning(f"⚠️ Could not set CPU affinity for worker {worker.pid}: {e}")
 
 def post_worker_init(worker):
     """Called just after a worker has initialized the application."""
@@ -120,6 +146,9 @@ def nworkers_changed(server, new_value, old_value):
 def on_exit(server):
     """Called just before exiting."""
     server.log.info("👋 Shutting down Render-Optimized Accident Detection API")
+    if model_server_process is not None and model_server_process.is_alive():
+        model_server_process.terminate()
+        model_server_process.join(timeout=10)
     server.log.info("✅ Graceful shutdown completed")
 
 # Environment-specific configurations
@@ -0,0 +1,86 @@
+# quantize_onnx.py
+"""
+Export the Keras accident model to ONNX and quantize it to INT8.
+Run once, then point ONNX_MODEL_PATH at the output to serve live batches
+through ONNX Runtime. Needs: pip install tf2onnx onnxruntime (or onnxruntime-gpu)
+
+    python quantize_onnx.py --calibration-dir sample_frames/ --output models/model_int8.onnx
+"""
+
+import os
+import sys
+import glob
+import argparse
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+import cv2
+import numpy as np
+
+from services.analysis_kernels import preprocess_batch
+
+DEFAULT_KERAS_MODEL = os.path.join(os.path.dirname(__file__), "models", "transfer_mobilenetv2_20250830_120140_best.keras")
+INPUT_SIZE = (224, 224)
+
+def export_onnx(keras_path: str, onnx_path: str):
+    """Convert the Keras model to a float32 ONNX graph"""
+    import tensorflow as tf
+    import tf2onnx
+
+    model = tf.keras.models.load_model(keras_path, compile=False)
+    spec = (tf.TensorSpec((None, INPUT_SIZE[1], INPUT_SIZE[0], 3), tf.float32, name="input"),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=13, output_path=onnx_path)
+    print(f"Exported float32 ONNX model to {onnx_path}")
+
+def make_calibration_reader(image_dir: str, limit: int):
+    """Feed representative frames, preprocessed exactly like live inference"""
+    from onnxruntime.quantization import CalibrationDataReader
+
+    paths = sorted(glob.glob(os.path.join(image_dir, "*.jpg")) + glob.glob(os.path.join(image_dir, "*.png")))[:limit]
+    if not paths:
+        raise ValueError(f"No calibration images found in {image_dir}")
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self):
+            self.paths = iter(paths)
+
+        def get_next(self):
+            for path in self.paths:
+                image = cv2.imread(path, cv2.IMREAD_COLOR)
+                if image is None:
+                    continue
+                tensor = np.empty((1, INPUT_SIZE[1], INPUT_SIZE[0], 3), dtype=np.float32)
+                return {"input": preprocess_batch([image], tensor)}
+            return None
+
+    print(f"Calibrating with {len(paths)} frames from {image_dir}")
+    return FrameReader()
+
+def quantize(float_path: str, int8_path: str, image_dir: str, limit: int):
+    """Static INT8 quantization (QDQ, per-channel weights) for CPU/CUDA/TensorRT"""
+    from onnxruntime.quantization import quantize_static, QuantFormat, QuantType
+
+    quantize_static(
+        float_path,
+        int8_path,
+        make_calibration_reader(image_dir, limit),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        # u8 activations x s8 weights is the operand layout VNNI's VPDPBUSD takes directly
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8
+    )
+    print(f"Quantized INT8 model written to {int8_path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export and INT8-quantize the accident detection model")
+    parser.add_argument("--keras-model", default=DEFAULT_KERAS_MODEL)
+    parser.add_argument("--calibration-dir", required=True, help="Directory of representative .jpg/.png frames")
+    parser.add_argument("--samples", type=int, default=300)
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(__file__), "models", "model_int8.onnx"))
+    args = parser.parse_args()
+
+    float_path = os.path.splitext(args.output)[0] + "_fp32.onnx"
+    export_onnx(args.keras_model, float_path)
+    quantize(float_path, args.output, args.calibration_dir, args.samples)
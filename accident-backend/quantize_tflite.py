@@ -0,0 +1,61 @@
+# quantize_tflite.py
+"""
+Convert the Keras accident model to a full-integer INT8 TFLite model.
+Run once; the detection service loads <model>_int8.tflite in place of the
+.keras file whenever it sits next to it. Needs: tensorflow
+
+    python quantize_tflite.py --calibration-dir sample_frames/
+"""
+
+import os
+import glob
+import argparse
+
+import cv2
+import numpy as np
+
+DEFAULT_KERAS_MODEL = os.path.join(os.path.dirname(__file__), "models", "transfer_mobilenetv2_20250830_120140_best.keras")
+INPUT_SIZE = (224, 224)
+
+def make_representative_dataset(image_dir: str, limit: int):
+    """Yield representative frames, preprocessed exactly like AccidentDetectionModel._preprocess_frame"""
+    paths = sorted(glob.glob(os.path.join(image_dir, "*.jpg")) + glob.glob(os.path.join(image_dir, "*.png")))[:limit]
+    if not paths:
+        raise ValueError(f"No calibration images found in {image_dir}")
+    print(f"Calibrating with {len(paths)} frames from {image_dir}")
+
+    def generator():
+        for path in paths:
+            image = cv2.imread(path, cv2.IMREAD_COLOR)
+            if image is None:
+                continue
+            image = cv2.cvtColor(cv2.resize(image, INPUT_SIZE), cv2.COLOR_BGR2RGB)
+            yield [np.expand_dims(image.astype(np.float32) / 255.0, axis=0)]
+
+    return generator
+
+def quantize(keras_path: str, tflite_path: str, image_dir: str, limit: int):
+    """Full-integer quantization with float32 input/output, so callers keep feeding [0, 1] frames"""
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(keras_path, compile=False)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = make_representative_dataset(image_dir, limit)
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+    with open(tflite_path, "wb") as f:
+        f.write(converter.convert())
+    print(f"Quantized INT8 model written to {tflite_path} ({os.path.getsize(tflite_path) / 1024 / 1024:.2f} MB)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="INT8-quantize the accident detection model for TFLite")
+    parser.add_argument("--keras-model", default=DEFAULT_KERAS_MODEL)
+    parser.add_argument("--calibration-dir", required=True, help="Directory of representative .jpg/.png frames")
+    parser.add_argument("--samples", type=int, default=100)
+    parser.add_argument("--output", default=None, help="Defaults to <keras model>_int8.tflite")
+    args = parser.parse_args()
+
+    # Same naming as services.detection.tflite_variant_path (not imported: it loads the model on import)
+    output = args.output or os.path.splitext(args.keras_model)[0] + "_int8.tflite"
+    quantize(args.keras_model, output, args.calibration_dir, args.samples)
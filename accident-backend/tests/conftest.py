@@ -0,0 +1,21 @@
+# tests/conftest.py - Run the app modules against a throwaway SQLite database
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Set before any app import: config.settings reads these once, at import time
+_db_dir = tempfile.mkdtemp(prefix="accident_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/test.db"
+for name in ("MODEL_SERVER_ADDRESS", "REDIS_URL", "LOCAL_RESPONSE_CACHE", "LIVE_BATCH_ROUTER"):
+    os.environ.pop(name, None)
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+sys.path.insert(0, APP_DIR)
+
+@pytest.fixture(scope="session")
+def db_tables():
+    """Create the schema once for tests that write rows"""
+    from models.database import create_tables
+    create_tables()
@@ -0,0 +1,95 @@
+# tests/test_alert_routing.py - New-alert frames only reach the connections they belong to
+import asyncio
+import uuid
+
+import orjson
+
+from routes import dashboard
+from services import analysis
+
+ACCIDENT = {"accident_detected": True, "confidence": 0.95, "predicted_class": "accident", "processing_time": 0.01}
+
+def notify_payload(owner: str) -> str:
+    """An accident_logs NOTIFY payload, as the migration's trigger builds it"""
+    return orjson.dumps({
+        "id": 7, "confidence": 0.9, "created_at": "2026-01-01T00:00:00+00:00", "status": "new",
+        "location": None, "snapshot_url": "/static/snapshots/7.jpg", "user_id": 1, "created_by": owner
+    }).decode()
+
+def drain(outbox: asyncio.Queue) -> list:
+    messages = []
+    while not outbox.empty():
+        messages.append(orjson.loads(outbox.get_nowait()))
+    return messages
+
+def connect(monkeypatch, owners: dict) -> dict:
+    """Register one alert WebSocket outbox per client id, owned by owners[client_id] (None: anonymous)"""
+    outboxes = {client_id: asyncio.Queue(maxsize=10) for client_id in owners}
+    monkeypatch.setattr(dashboard, "alert_connections", dict(outboxes))
+    monkeypatch.setattr(dashboard, "alert_owners", {c: o for c, o in owners.items() if o is not None})
+    return outboxes
+
+def test_notify_reaches_only_owner_connections(monkeypatch):
+    async def scenario():
+        outboxes = connect(monkeypatch, {"alice_tab": "alice", "bob_tab": "bob", "anonymous": None})
+        await dashboard.push_new_alert(notify_payload("alice"))
+        return {client_id: drain(outbox) for client_id, outbox in outboxes.items()}
+
+    received = asyncio.run(scenario())
+    assert [m["type"] for m in received["alice_tab"]] == ["new_alert"]
+    assert received["alice_tab"][0]["data"]["created_by"] == "alice"
+    assert received["bob_tab"] == []
+    assert received["anonymous"] == []
+
+def test_notify_for_disconnected_owner_is_dropped(monkeypatch):
+    async def scenario():
+        outboxes = connect(monkeypatch, {"bob_tab": "bob"})
+        await dashboard.push_new_alert(notify_payload("alice"))
+        return drain(outboxes["bob_tab"])
+
+    assert asyncio.run(scenario()) == []
+
+def save_accident(monkeypatch, live_alert: bool) -> list:
+    """save_to_database one high-confidence accident; returns the frames it published"""
+    published = []
+
+    async def record(message):
+        published.append(orjson.loads(message))
+    monkeypatch.setattr(dashboard, "publish_alert_update", record)
+
+    async def scenario():
+        # A fresh source per call so an earlier test's cooldown doesn't apply
+        source = f"test_{uuid.uuid4().hex[:8]}"
+        log_id = analysis.save_to_database(dict(ACCIDENT), "frame_1", source, live_alert=live_alert)
+        # The alert runs as a task on this loop
+        for _ in range(5):
+            await asyncio.sleep(0)
+        return log_id
+
+    assert asyncio.run(scenario()) is not None
+    return published
+
+def test_upload_accident_is_not_broadcast(monkeypatch, db_tables):
+    assert save_accident(monkeypatch, live_alert=False) == []
+
+def test_live_feed_accident_is_broadcast_once(monkeypatch, db_tables):
+    published = save_accident(monkeypatch, live_alert=True)
+    assert [m["type"] for m in published] == ["new_alert"]
+    assert published[0]["data"]["created_by"] is None
+
+def test_live_feed_alert_cooldown_per_stream(db_tables):
+    source = f"test_{uuid.uuid4().hex[:8]}"
+    assert analysis.claim_alert_slot(source, "session")
+    assert not analysis.claim_alert_slot(source, "session")
+    assert analysis.claim_alert_slot(source, "other_session")
+
+def test_owned_row_is_never_broadcast(monkeypatch):
+    published = []
+
+    async def record(message):
+        published.append(message)
+    monkeypatch.setattr(dashboard, "publish_alert_update", record)
+
+    owned = analysis.AccidentLog(id=1, confidence=0.9, status="new", created_by="alice", user_id=1)
+    asyncio.run(dashboard.broadcast_real_accident(owned))
+    assert published == []
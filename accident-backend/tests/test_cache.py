@@ -0,0 +1,67 @@
+# tests/test_cache.py - The in-process response cache is opt-in and never shadows Redis
+import os
+import subprocess
+import sys
+
+import pytest
+
+from services import cache
+
+from conftest import APP_DIR
+
+USER = {"id": 3, "user_type": "user", "username": "carol"}
+
+def run_cache_script(env_overrides: dict) -> str:
+    """A set/get round trip in a fresh process, since the cache mode is fixed at import"""
+    env = dict(os.environ, **env_overrides)
+    script = (
+        "from services import cache; "
+        "cache.set_json('stats:user:3', {'total': 1}, 30); "
+        "print(cache._local_enabled, cache.get_json('stats:user:3'))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", script], cwd=APP_DIR, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert completed.returncode == 0, completed.stderr
+    return completed.stdout.strip().splitlines()[-1]
+
+@pytest.fixture
+def local_cache(monkeypatch):
+    """The per-process cache as LOCAL_RESPONSE_CACHE=1 configures it, starting empty"""
+    monkeypatch.setattr(cache, "_redis_client", None)
+    monkeypatch.setattr(cache, "_local_enabled", True)
+    monkeypatch.setattr(cache, "_local_cache", {})
+    return cache._local_cache
+
+def test_disabled_by_default():
+    assert not cache._local_enabled
+    cache.set_json("stats:user:3", {"total": 1}, 30)
+    assert cache.get_json("stats:user:3") is None
+    assert cache._local_cache == {}
+
+def test_env_opt_in_enables_local_cache():
+    assert run_cache_script({"LOCAL_RESPONSE_CACHE": "1"}) == "True {'total': 1}"
+
+def test_redis_url_takes_precedence_over_local_cache():
+    # Nothing listens on port 1: Redis reads fail, and must not fall back to a per-process copy
+    output = run_cache_script({"LOCAL_RESPONSE_CACHE": "1", "REDIS_URL": "redis://127.0.0.1:1/0"})
+    assert output == "False None"
+
+def test_local_entries_expire(local_cache, monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: clock[0])
+    cache.set_json("profile:user:3", {"uploads": 2}, 30)
+    assert cache.get_json("profile:user:3") == {"uploads": 2}
+    clock[0] += 31
+    assert cache.get_json("profile:user:3") is None
+
+def test_invalidate_user_drops_every_kind(local_cache):
+    for kind in cache.USER_CACHE_KINDS:
+        cache.set_json(cache.user_cache_key(kind, USER), True, 30)
+    other = {**USER, "user_type": "admin"}
+    cache.set_json(cache.user_cache_key("stats", other), True, 30)
+
+    cache.invalidate_user(USER)
+    assert all(cache.get_json(cache.user_cache_key(kind, USER)) is None for kind in cache.USER_CACHE_KINDS)
+    # Admin and user ids overlap; only the invalidated user type is cleared
+    assert cache.get_json(cache.user_cache_key("stats", other)) is True
@@ -0,0 +1,79 @@
+# tests/test_dashboard_queries.py - Per-user dashboard queries against real rows
+import itertools
+import time
+from datetime import timedelta
+
+import pytest
+
+from models.database import SessionLocal, AccidentLog, utcnow
+from routes.dashboard import get_user_stats, user_alerts_statement
+
+# Every test gets users of its own, so rows from other tests never match
+_user_ids = itertools.count(1000)
+
+class DashboardUser:
+    department = "Testing"
+
+def add_accident(db, user_id: int, age: timedelta, confidence: float = 0.9) -> AccidentLog:
+    created_at = utcnow() - age
+    log = AccidentLog(
+        accident_detected=True, confidence=confidence, status="new",
+        user_id=user_id, created_by=f"user{user_id}", timestamp=created_at, created_at=created_at
+    )
+    db.add(log)
+    db.commit()
+    return log
+
+@pytest.fixture
+def db(db_tables):
+    session = SessionLocal()
+    yield session
+    session.close()
+
+@pytest.fixture
+def local_timezone(monkeypatch):
+    """Run with the host clock ahead of UTC, where naive local cutoffs drop recent rows"""
+    monkeypatch.setenv("TZ", "Asia/Kolkata")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+def test_user_stats_cutoffs_are_utc(db, local_timezone):
+    user_id = next(_user_ids)
+    add_accident(db, user_id, timedelta(hours=20))
+    add_accident(db, user_id, timedelta(days=3))
+    add_accident(db, user_id, timedelta(days=8))
+
+    stats = get_user_stats(db, DashboardUser(), {"id": user_id, "username": f"user{user_id}", "user_type": "user"})
+    assert stats["source"] == "database"
+    assert stats["last_24h_detections"] == 1
+    assert stats["total_alerts"] == 2
+
+def alert_ids(db, user_id: int, limit: int, offset: int) -> list:
+    return [row[0].id for row in db.execute(user_alerts_statement(user_id, limit, offset)).all()]
+
+def test_user_alerts_statement_rebinds_every_parameter(db):
+    """The lambda_stmt's compiled SELECT is cached; each call must still bind its own user, limit and offset"""
+    alice, bob = next(_user_ids), next(_user_ids)
+    alice_ids = [add_accident(db, alice, timedelta(minutes=m)).id for m in range(1, 6)]
+    bob_ids = [add_accident(db, bob, timedelta(minutes=m)).id for m in range(1, 4)]
+    add_accident(db, alice, timedelta(minutes=10), confidence=0.5)
+
+    # Newest first, below-threshold rows excluded
+    assert alert_ids(db, alice, 10, 0) == alice_ids
+    assert alert_ids(db, bob, 10, 0) == bob_ids
+    assert alert_ids(db, alice, 2, 0) == alice_ids[:2]
+    assert alert_ids(db, alice, 2, 2) == alice_ids[2:4]
+    assert alert_ids(db, bob, 1, 2) == bob_ids[2:]
+
+def test_user_alerts_statement_window_counts(db):
+    user_id = next(_user_ids)
+    logs = [add_accident(db, user_id, timedelta(minutes=m)) for m in range(1, 4)]
+    logs[0].status = "acknowledged"
+    db.commit()
+
+    rows = db.execute(user_alerts_statement(user_id, 1, 1)).all()
+    assert [row[0].id for row in rows] == [logs[1].id]
+    # Totals cover the whole filtered set, not just the page
+    assert (rows[0].total, rows[0].unread) == (3, 2)
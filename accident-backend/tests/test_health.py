@@ -0,0 +1,36 @@
+# tests/test_health.py - Model status probes: what is cached, and for how long
+import pytest
+
+from routes import health
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    """An empty models directory with a fresh status cache"""
+    monkeypatch.setitem(health.MODEL_CONFIG, "model_dir", str(tmp_path))
+    monkeypatch.setattr(health, "_model_status_cache", {"value": None, "expires": 0.0})
+    return tmp_path
+
+def test_tflite_added_later_is_served(model_dir):
+    assert health.get_model_path() == str(model_dir / health.MODEL_CONFIG["active_model"])
+    (model_dir / health.MODEL_CONFIG["active_model_tflite"]).touch()
+    assert health.get_model_path() == str(model_dir / health.MODEL_CONFIG["active_model_tflite"])
+
+def test_status_is_cached_within_ttl(model_dir):
+    assert health.check_model_status()["model_status"] == "file_missing"
+    (model_dir / health.MODEL_CONFIG["active_model"]).touch()
+    assert health.check_model_status()["model_status"] == "file_missing"
+
+    health._model_status_cache["expires"] = 0.0
+    assert health.check_model_status()["model_status"] == "ready"
+
+def test_failed_check_is_not_cached(model_dir, monkeypatch):
+    (model_dir / health.MODEL_CONFIG["active_model"]).touch()
+    real_get_model_path = health.get_model_path
+
+    def failing_get_model_path():
+        raise OSError("stale NFS handle")
+    monkeypatch.setattr(health, "get_model_path", failing_get_model_path)
+    assert health.check_model_status()["model_status"] == "error"
+
+    monkeypatch.setattr(health, "get_model_path", real_get_model_path)
+    assert health.check_model_status()["model_status"] == "ready"
@@ -0,0 +1,89 @@
+# tests/test_live_router.py - The batched live router: where it is mounted and how it caches
+import base64
+import os
+import subprocess
+import sys
+
+import cv2
+import msgspec
+import numpy as np
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers import live
+
+from conftest import APP_DIR
+
+def jpeg_frame(seed: int) -> bytes:
+    image = np.random.default_rng(seed).integers(0, 256, (240, 320, 3), dtype=np.uint8)
+    return cv2.imencode(".jpg", image)[1].tobytes()
+
+def binary_message(frame_id: int, frame: bytes) -> bytes:
+    return live.FRAME_HEADER.pack(frame_id, 1700000000000) + frame
+
+@pytest.fixture
+def client(monkeypatch):
+    """The live router on its own app, with a fresh inference loop and result cache"""
+    monkeypatch.setattr(live, "frame_queue", None)
+    monkeypatch.setattr(live, "_server_task", None)
+    monkeypatch.setattr(live, "_result_cache", live.OrderedDict())
+    app = FastAPI()
+    app.include_router(live.router)
+    with TestClient(app) as test_client:
+        yield test_client
+
+def served_by(env_overrides: dict, tmp_path) -> str:
+    """Module serving /api/live/ws when main.py is imported with these settings"""
+    env = dict(os.environ, PYTHONPATH=APP_DIR, **env_overrides)
+    script = (
+        "import main; "
+        "print(next(r.endpoint.__module__ for r in main.app.routes if r.path == '/api/live/ws'))"
+    )
+    # Run elsewhere: importing main sets up a log file in the working directory
+    completed = subprocess.run(
+        [sys.executable, "-c", script], cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert completed.returncode == 0, completed.stderr
+    return completed.stdout.strip().splitlines()[-1]
+
+def test_legacy_websocket_served_by_default(tmp_path):
+    assert served_by({}, tmp_path) == "api.websocket"
+
+def test_flag_mounts_batched_router(tmp_path):
+    assert served_by({"LIVE_BATCH_ROUTER": "1"}, tmp_path) == "routers.live"
+
+def test_text_and_binary_frames(client):
+    frame = jpeg_frame(1)
+    with client.websocket_connect("/api/live/ws") as websocket:
+        websocket.send_text(orjson.dumps({
+            "frame": base64.b64encode(frame).decode(), "frame_id": "text-1", "timestamp": 5
+        }).decode())
+        text_reply = orjson.loads(websocket.receive_text())
+        websocket.send_bytes(binary_message(2, frame))
+        binary_reply = msgspec.msgpack.decode(websocket.receive_bytes())
+
+    assert text_reply["frame_id"] == "text-1" and text_reply["timestamp"] == 5
+    assert binary_reply["frame_id"] == 2
+    # Same frame, same connection: the second reply is the cached result
+    assert binary_reply["confidence"] == text_reply["confidence"]
+
+def test_result_cache_is_per_connection(client):
+    frame = jpeg_frame(2)
+    for _ in range(2):
+        with client.websocket_connect("/api/live/ws") as websocket:
+            websocket.send_bytes(binary_message(1, frame))
+            websocket.receive_bytes()
+
+    streams = [stream for stream, _ in live._result_cache]
+    # One entry per connection for the identical frame, never shared between them
+    assert len(streams) == 2 and len(set(streams)) == 2
+    assert len({frame_hash for _, frame_hash in live._result_cache}) == 1
+
+def test_http_frames_are_not_cached(client):
+    response = client.post("/api/live/frame", json={"frame": base64.b64encode(jpeg_frame(3)).decode(), "timestamp": 9})
+    assert response.status_code == 200
+    assert response.json()["timestamp"] == 9
+    assert len(live._result_cache) == 0
+    assert client.get("/api/live/status").json()["status"] == "running"
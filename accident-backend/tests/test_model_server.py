@@ -0,0 +1,88 @@
+# tests/test_model_server.py - Model server clients degrade to "not ready" instead of failing
+import os
+import socket
+import subprocess
+import sys
+import threading
+from multiprocessing.connection import Listener
+
+import pytest
+
+from services import model_server
+from services.model_server import RemoteModel
+
+from conftest import APP_DIR
+
+AUTHKEY = b"test-authkey"
+
+def unused_address() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"127.0.0.1:{sock.getsockname()[1]}"
+
+class LoadedModel:
+    input_size = (160, 160)
+    threshold = 0.5
+
+    def get_model_info(self):
+        return {"is_loaded": True, "input_size": self.input_size, "threshold": self.threshold}
+
+    def predict(self, frame):
+        return {"accident_detected": False, "confidence": 0.1}
+
+def test_import_with_unreachable_server_reports_not_ready():
+    env = dict(os.environ, MODEL_SERVER_ADDRESS=unused_address())
+    env.pop(model_server.SERVER_ROLE_ENV, None)
+    script = (
+        "import services.analysis as analysis; "
+        "print(type(analysis.accident_model).__name__, analysis.get_model_info()['model_loaded'])"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", script], cwd=APP_DIR, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.split()[-2:] == ["RemoteModel", "False"]
+
+def test_unreachable_server_probe_is_none_after_one_attempt(monkeypatch):
+    attempts = []
+    real_client = model_server.Client
+
+    def counting_client(*args, **kwargs):
+        attempts.append(args)
+        return real_client(*args, **kwargs)
+    monkeypatch.setattr(model_server, "Client", counting_client)
+
+    assert RemoteModel(unused_address(), AUTHKEY).model is None
+    assert len(attempts) == 1
+
+def test_call_retries_with_backoff_then_raises(monkeypatch):
+    delays = []
+    monkeypatch.setattr(model_server.time, "sleep", delays.append)
+
+    with pytest.raises(ConnectionRefusedError):
+        RemoteModel(unused_address(), AUTHKEY).predict(None)
+    assert len(delays) == model_server.CONNECT_ATTEMPTS - 1
+    assert delays == sorted(delays) and delays[0] == model_server.CONNECT_BACKOFF
+
+def test_call_connects_once_the_server_is_listening(monkeypatch):
+    address = unused_address()
+    listener = None
+
+    def start_listening(delay):
+        # The server binds while the client is backing off
+        nonlocal listener
+        listener = Listener(model_server.parse_address(address), authkey=AUTHKEY)
+        threading.Thread(target=serve_one, daemon=True).start()
+
+    def serve_one():
+        model_server._serve_connection(listener.accept(), LoadedModel(), threading.Lock())
+    monkeypatch.setattr(model_server.time, "sleep", start_listening)
+
+    remote = RemoteModel(address, AUTHKEY)
+    try:
+        assert remote.predict(None) == {"accident_detected": False, "confidence": 0.1}
+        # The probe reuses the pooled connection and picks up the served input size
+        assert remote.model == f"remote:{address}"
+        assert remote.input_size == LoadedModel.input_size
+    finally:
+        listener.close()
@@ -0,0 +1,102 @@
+# tests/test_pg_notify.py - Alert NOTIFY: which rows the trigger fires for, and the LISTEN loop
+import asyncio
+from contextlib import contextmanager
+
+import pytest
+
+from database import migration
+from services import pg_notify
+
+class RecordingEngine:
+    """Engine stand-in that keeps the SQL it is asked to run"""
+
+    def __init__(self):
+        self.statements = []
+
+    @contextmanager
+    def begin(self):
+        yield self
+
+    def execute(self, statement):
+        self.statements.append(str(statement))
+
+def test_trigger_only_fires_for_rows_the_alert_list_shows():
+    engine = RecordingEngine()
+    migration.create_alert_notify_trigger(engine, "postgresql://localhost/accidents")
+    create_trigger = next(s for s in engine.statements if s.startswith("CREATE TRIGGER"))
+    when = create_trigger.split("WHEN (", 1)[1]
+    assert f"NEW.confidence >= {migration.ALERT_MIN_CONFIDENCE}" in when
+    assert "NEW.accident_detected" in when and "NEW.created_by IS NOT NULL" in when
+    # OLD is not allowed in the WHEN clause of an INSERT trigger
+    assert "OLD." not in when
+
+def test_no_trigger_on_sqlite():
+    engine = RecordingEngine()
+    migration.create_alert_notify_trigger(engine, "sqlite:///./accident_detection.db")
+    assert engine.statements == []
+
+class Notify:
+    def __init__(self, payload: str):
+        self.payload = payload
+
+class FakeConnection:
+    """AsyncConnection stand-in that delivers a fixed list of notifications, then ends the stream"""
+
+    def __init__(self, payloads):
+        self.payloads = payloads
+        self.executed = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, query):
+        self.executed.append(query)
+
+    async def notifies(self):
+        for payload in self.payloads:
+            yield Notify(payload)
+
+def test_listener_survives_a_failing_payload(monkeypatch):
+    pytest.importorskip("psycopg")
+    connections = [FakeConnection(["not json", '{"id": 1}', '{"id": 2}'])]
+
+    async def connect(*args, **kwargs):
+        if not connections:
+            # The stream ended and listen() reconnected: stop here
+            raise asyncio.CancelledError
+        return connections.pop(0)
+
+    monkeypatch.setattr(pg_notify, "enabled", lambda: True)
+    monkeypatch.setattr(pg_notify.psycopg.AsyncConnection, "connect", connect)
+
+    handled = []
+
+    async def handler(payload):
+        handled.append(payload)
+        if payload == "not json":
+            raise ValueError("malformed payload")
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(pg_notify.listen("accident_alerts", handler))
+    assert handled == ["not json", '{"id": 1}', '{"id": 2}']
+
+def test_listener_propagates_cancellation_from_handler(monkeypatch):
+    pytest.importorskip("psycopg")
+    monkeypatch.setattr(pg_notify, "enabled", lambda: True)
+
+    async def connect(*args, **kwargs):
+        return FakeConnection(['{"id": 1}', '{"id": 2}'])
+    monkeypatch.setattr(pg_notify.psycopg.AsyncConnection, "connect", connect)
+
+    handled = []
+
+    async def handler(payload):
+        handled.append(payload)
+        raise asyncio.CancelledError
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(pg_notify.listen("accident_alerts", handler))
+    assert handled == ['{"id": 1}']
@@ -0,0 +1,47 @@
+# tests/test_shutdown.py - Lifespan shutdown waits for running predictions without blocking the loop
+import asyncio
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services import analysis
+
+@pytest.fixture
+def fresh_pools(monkeypatch):
+    """Private pools, so shutting them down leaves the module's own pools to the other tests"""
+    pools = [ThreadPoolExecutor(max_workers=1) for _ in range(2)]
+    monkeypatch.setattr(analysis, "ml_thread_pool", pools[0])
+    monkeypatch.setattr(analysis, "ml_infer_pool", pools[1])
+    monkeypatch.setattr(analysis, "ml_process_pool", None)
+    monkeypatch.setattr(analysis, "_outstanding_work", weakref.WeakSet())
+    monkeypatch.setattr(analysis, "SHUTDOWN_DRAIN_TIMEOUT", 5.0)
+    return pools
+
+def test_cleanup_drains_off_the_event_loop(fresh_pools):
+    release = threading.Event()
+
+    async def scenario():
+        running = analysis.submit_tracked(analysis.ml_thread_pool, release.wait, 5.0)
+        queued = analysis.submit_tracked(analysis.ml_thread_pool, release.wait, 5.0)
+        cleanup = asyncio.create_task(analysis.cleanup_thread_pool_async())
+
+        # The loop keeps running other connections' work while the prediction drains
+        ticks = 0
+        while not cleanup.done() and ticks < 5:
+            await asyncio.sleep(0.01)
+            ticks += 1
+        assert not cleanup.done() and ticks == 5
+
+        release.set()
+        released_at = time.monotonic()
+        await cleanup
+        # Returns as soon as the running prediction does; the cancelled one isn't waited on
+        assert time.monotonic() - released_at < analysis.SHUTDOWN_DRAIN_TIMEOUT / 2
+        return running, queued
+
+    running, queued = asyncio.run(scenario())
+    assert running.result() is True
+    assert queued.cancelled()
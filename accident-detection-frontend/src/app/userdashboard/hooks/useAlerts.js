@@ -168,7 +168,10 @@ export const useAlerts = (useRealTime = true) => {
     const connectWebSocket = () => {
       try {
         const { baseURL } = getApiConfig();
-        const wsUrl = baseURL.replace('http', 'ws') + '/api/dashboard/ws/alerts';
+        const token = localStorage.getItem('token');
+        // The token lets the server push this user's new alerts as they are logged
+        const wsUrl = baseURL.replace('http', 'ws') + '/api/dashboard/ws/alerts' +
+          (token ? `?token=${encodeURIComponent(token)}` : '');
         
         console.log('Connecting to WebSocket:', wsUrl);
         websocket = new WebSocket(wsUrl);